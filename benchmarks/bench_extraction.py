@@ -0,0 +1,63 @@
+"""Benchmark page-parallel PDF text extraction on a synthetic document.
+
+Usage::
+
+    python -m benchmarks.bench_extraction --pages 500 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+
+from darts_core.documents import _get_pdf_pool, extract_text_from_pdf  # noqa: E402
+
+PARAGRAPH = (
+    "The Achiever persona is motivated by measurable progress, public recognition and clear goals. "
+    "They respond to messages that emphasise outcomes, rankings and the path to the next milestone. "
+)
+
+
+def build_pdf(pages, lines_per_page=45):
+    """Return the bytes of a text-heavy PDF with the given number of pages."""
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = "\n".join(f"{number}.{line} {PARAGRAPH[:90]}" for line in range(lines_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = build_pdf(args.pages)
+    print(f"{args.pages} pages, {len(data) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'best s':>8} {'pages/s':>9} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        if workers > 1:
+            _get_pdf_pool(workers)  # Exclude process start-up from the timings; the pool is reused
+            extract_text_from_pdf(data, workers)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            text = extract_text_from_pdf(data, workers)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>8.3f} {args.pages / best:>9.0f} {baseline / best:>7.2f}x  ({len(text)} chars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark Dart extraction and Dart x content generation against the local mock OpenAI server.
+
+Usage::
+
+    python -m benchmarks.bench_pipeline --darts 5 20 100 --contents 3 --workers 8
+    python -m benchmarks.bench_pipeline --darts 20 --per-dart --throttle-rate 0.05 --cache
+
+The mock server runs in a child process so its threads and memory stay out of the
+measurements. Each row reports wall time, LLM calls made by the pipeline, HTTP requests the
+server saw (including retried attempts), tokens and the peak Python heap of the run.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai  # noqa: E402
+
+from darts_core.gateway import LLMGateway  # noqa: E402
+from darts_core.llm import LLMClient  # noqa: E402
+from darts_core.llm_cache import CompletionCache  # noqa: E402
+from darts_core.metrics import MetricsRecorder  # noqa: E402
+from darts_core.pipeline import extract_all_darts, personalize_content, summarize_brand  # noqa: E402
+
+ADJECTIVES = ["Ambitious", "Curious", "Careful", "Loyal", "Playful", "Thrifty", "Social", "Quiet", "Bold", "Practical"]
+NOUNS = ["Achiever", "Explorer", "Planner", "Nurturer", "Maker", "Saver", "Connector", "Thinker", "Leader", "Builder"]
+DART_BODY = (
+    "Characteristics: values clear outcomes, compares options before committing and shares results with peers. "
+    "Psychographic drivers: recognition, security and the feeling of making steady, visible progress. "
+    "Preferred channels are email and short video; they respond to concrete numbers and honest trade-offs. "
+)
+BRAND_GUIDE = (
+    "Brand voice: warm, plain-spoken and confident. Positioning: the trusted local guide for busy families. "
+    "Unique value propositions: same-day answers, transparent pricing and advisors who live nearby. "
+) * 20
+CONTENT = (
+    "Subject: Your spring plan is ready\n\nHi there,\n\nWe put together a plan that fits your schedule and budget. "
+    "It takes ten minutes to review and you can change anything before it starts.\n\nSee you soon,\nThe team"
+)
+
+
+def dart_names(count):
+    """Return count distinct synthetic Dart names."""
+    return [f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[(i // len(ADJECTIVES)) % len(NOUNS)]} {i + 1}" for i in range(count)]
+
+
+def build_darts_document(count):
+    """Return a darts document describing count Darts, one section each."""
+    return "Audience Darts\n\n" + "\n\n".join(f"Dart: {name}\n{DART_BODY * 3}" for name in dart_names(count))
+
+
+def start_mock_server(args):
+    """Start the mock server in a child process and return (process, base URL)."""
+    command = [
+        sys.executable, "-m", "benchmarks.mock_openai", "--port", str(args.port),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        "--completion-tokens", str(args.completion_tokens), "--error-rate", str(args.error_rate),
+        "--throttle-rate", str(args.throttle_rate), "--max-concurrency", str(args.server_concurrency),
+    ]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=root, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # Wait for the "listening" line
+    return process, f"http://127.0.0.1:{args.port}/v1"
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(base_url.rsplit("/v1", 1)[0] + "/stats") as response:
+        return json.load(response)
+
+
+def run_pipeline(llm, darts_text, contents, args):
+    """Run brand summary, Dart extraction and generation; return (Darts found, failed variants)."""
+    brand_summary = summarize_brand(llm, BRAND_GUIDE)
+    darts = extract_all_darts(
+        llm, darts_text, max_workers=args.workers, structured=not args.per_dart, context_tokens=args.context_tokens,
+    )
+    results = personalize_content(llm, contents, brand_summary, darts, max_workers=args.workers)
+    return len(darts), sum(result.error is not None for result in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--darts", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--contents", type=int, default=1, help="Content pieces generated for every Dart.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-dart", action="store_true", help="Extract Dart details with one request per Dart.")
+    parser.add_argument("--context-tokens", type=int, default=8000)
+    parser.add_argument("--cache", action="store_true", help="Use a fresh completion cache and add a warm-cache run.")
+    parser.add_argument("--server-url", help="Use an already running mock server instead of starting one.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--server-concurrency", type=int, default=0, help="Mock server concurrency before 429s.")
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.server_url
+    if base_url is None:
+        process, base_url = start_mock_server(args)
+    client = openai.OpenAI(base_url=base_url, api_key="mock", max_retries=0)
+
+    print(
+        f"mock latency {args.latency}s, {args.tokens_per_second:g} tok/s, {args.workers} workers, "
+        f"{'per-Dart' if args.per_dart else 'structured'} extraction, {args.contents} content piece(s)"
+    )
+    print(f"{'darts':>6} {'run':>5} {'wall s':>8} {'calls':>6} {'cached':>6} {'http':>6} {'retries':>7} "
+          f"{'tokens':>8} {'peak MB':>8} {'failed':>6}")
+    tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for count in args.darts:
+                darts_text = build_darts_document(count)
+                contents = {f"content_{number}.txt": f"{CONTENT}\n\nVersion {number}" for number in range(args.contents)}
+                cache = CompletionCache(os.path.join(cache_dir, f"{count}.sqlite3")) if args.cache else None
+                gateway = LLMGateway(client=client, max_concurrency=args.workers)
+                runs = ["cold", "warm"] if args.cache else ["cold"]
+                for run in runs:
+                    metrics = MetricsRecorder()
+                    llm = LLMClient(gateway, cache=cache, metrics=metrics)
+                    before = server_stats(base_url)
+                    tracemalloc.reset_peak()
+                    start = time.perf_counter()
+                    found, failed = run_pipeline(llm, darts_text, contents, args)
+                    wall = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    after = server_stats(base_url)
+                    rows = metrics.summary()
+                    calls = sum(row["calls"] for row in rows)
+                    cached = sum(row["cache_hits"] for row in rows)
+                    tokens = sum(row["prompt_tokens"] + row["completion_tokens"] for row in rows)
+                    retries = sum(row["retries"] for row in rows)
+                    note = "" if found == count else f"  ({found} Darts found)"
+                    print(
+                        f"{count:>6} {run:>5} {wall:>8.2f} {calls:>6} {cached:>6} "
+                        f"{after['requests'] - before['requests']:>6} {retries:>7} {tokens:>8} "
+                        f"{peak / 1024 / 1024:>8.1f} {failed:>6}{note}"
+                    )
+    finally:
+        tracemalloc.stop()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark cold start: module import times and the first render of the Streamlit app.
+
+Usage::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --modules darts_core.cli
+
+Every measurement runs in a fresh interpreter so nothing is already imported or cached. Import
+rows report the median wall time of ``import <module>`` and which heavy optional dependencies
+(openai, PyMuPDF, python-docx, pandas) it pulled in; those should only load on first use. The
+render row runs darts.py once with Streamlit's AppTest, with its on-disk caches in a
+temporary directory, and reports the time to the first complete script run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = [
+    "darts_core.documents",
+    "darts_core.export",
+    "darts_core.gateway",
+    "darts_core.pipeline",
+    "darts_core.jobs",
+    "darts_core.batch",
+    "darts_core.cli",
+    "streamlit",
+]
+HEAVY_MODULES = ["openai", "fitz", "docx", "pandas"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+RENDER_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=60)
+app.secrets["OPENAI_API_KEY"] = "benchmark"
+app.run()
+done = time.perf_counter()
+print(json.dumps({{
+    "streamlit_seconds": imported - start,
+    "render_seconds": done - imported,
+    "exceptions": [str(exception.value) for exception in app.exception],
+}}))
+"""
+
+
+def run_python(code, env=None):
+    """Run code in a fresh interpreter from the repository root and return its JSON output."""
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def render_env(directory):
+    """Return an environment that keeps the app's on-disk state inside directory."""
+    env = dict(os.environ)
+    env.update({
+        "DARTS_LLM_CACHE_PATH": os.path.join(directory, "llm_cache.sqlite3"),
+        "DARTS_TEXT_CACHE_DIR": os.path.join(directory, "documents"),
+        "DARTS_STORE_PATH": os.path.join(directory, "store.sqlite3"),
+        "DARTS_JOBS_PATH": os.path.join(directory, "jobs.sqlite3"),
+    })
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules whose cold import is timed.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per measurement.")
+    parser.add_argument("--no-render", action="store_true", help="Skip the first-render measurement.")
+    args = parser.parse_args(argv)
+
+    print(f"{'import':<24} {'median s':>9} {'min s':>7}  heavy modules loaded")
+    for module in args.modules:
+        runs = [run_python(IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)) for _ in range(args.repeat)]
+        seconds = [run["seconds"] for run in runs]
+        print(
+            f"{module:<24} {statistics.median(seconds):>9.3f} {min(seconds):>7.3f}  "
+            f"{', '.join(runs[-1]['loaded']) or '-'}"
+        )
+
+    if args.no_render:
+        return
+    print(f"\n{'first render':<24} {'median s':>9} {'min s':>7}  streamlit import s")
+    renders = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            renders.append(run_python(RENDER_SCRIPT.format(app=os.path.join(ROOT, "darts.py")), render_env(directory)))
+    seconds = [render["render_seconds"] for render in renders]
+    print(
+        f"{'darts.py':<24} {statistics.median(seconds):>9.3f} {min(seconds):>7.3f}  "
+        f"{statistics.median(render['streamlit_seconds'] for render in renders):.3f}"
+    )
+    for exception in renders[-1]["exceptions"]:
+        print(f"  render raised: {exception}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""Local stand-in for the OpenAI chat-completions API, for benchmarks that must not cost money.
+
+Usage::
+
+    python -m benchmarks.mock_openai --port 8089 --latency 0.3 --tokens-per-second 150 --throttle-rate 0.05
+
+Point a client at it with ``openai.OpenAI(base_url="http://127.0.0.1:8089/v1", api_key="mock")``.
+Answers are shaped like the pipeline's prompts expect: Dart names and details are read back
+from the ``Dart: <name>`` lines of the document in the prompt, and everything else gets filler
+text of --completion-tokens tokens. Latency, token rate, server errors and 429s are configurable,
+and ``GET /stats`` returns the request, failure and token counts served so far.
+
+The batch interface is supported too: ``POST /v1/files`` (purpose "batch"), ``POST /v1/batches``,
+``GET /v1/batches/<id>``, ``POST /v1/batches/<id>/cancel`` and ``GET /v1/files/<id>/content``.
+A batch completes --batch-delay seconds after submission; --error-rate applies per request line.
+With --batch-status failed (or expired, cancelled) batches end in that status without output.
+"""
+import argparse
+import email.parser
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DART_LINE = re.compile(r"^Dart: (.+)$", re.M)
+WORDS = (
+    "our team helps you reach the goals that matter with clear steps honest advice and support that adapts "
+    "to the way you work every day so progress feels natural measurable and worth sharing"
+).split()
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def mock_answer(prompt, completion_tokens):
+    """Return a plausible answer for one of the pipeline's prompts."""
+    names = DART_LINE.findall(prompt)
+    if "Respond with JSON only" in prompt:
+        return json.dumps({"darts": [
+            {"name": name, "characteristics": [f"{name} trait"], "psychographic_drivers": [f"{name} driver"]}
+            for name in names
+        ]})
+    if "List only the names" in prompt:
+        return "\n".join(f"{number}. {name}" for number, name in enumerate(names, start=1))
+    if "Provide only the characteristics" in prompt:
+        dart = re.search(r"for the Dart '(.+?)'", prompt)
+        dart = dart.group(1) if dart else "this Dart"
+        return f"- Characteristics: {dart} trait\n- Psychographic Drivers: {dart} driver"
+    if "Extract the brand voice" in prompt:
+        return "Brand Voice: Warm and direct.\nBrand Positioning: The trusted guide.\nUnique Value Propositions: Fast, fair, local."
+    return " ".join(WORDS[i % len(WORDS)] for i in range(completion_tokens))
+
+
+def completion_body(request, completion_tokens):
+    """Return the chat.completion response body and usage for a request body."""
+    prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+    answer = mock_answer(prompt, completion_tokens)
+    prompt_tokens, answer_tokens = estimate_tokens(prompt), estimate_tokens(answer)
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": answer_tokens,
+             "total_tokens": prompt_tokens + answer_tokens}
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+def parse_multipart(content_type, body):
+    """Return {field name: (filename, bytes)} for a multipart/form-data request body."""
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.get_payload()
+    }
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering /v1/chat/completions with configurable behaviour."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, tokens_per_second=200.0, completion_tokens=200,
+                 error_rate=0.0, throttle_rate=0.0, max_concurrency=0, retry_after=0.5, batch_delay=1.0,
+                 batch_status="completed", seed=None):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.batch_delay = batch_delay
+        self.batch_status = batch_status
+        self.files = {}
+        self.batches = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve on a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def admit(self):
+        """Return None to serve the request, or the (status, message) of an injected failure."""
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.max_concurrency and self.active >= self.max_concurrency:
+                self.stats["throttled"] += 1
+                return 429, "Rate limit reached: too many concurrent requests."
+            roll = self.random.random()
+            if roll < self.throttle_rate:
+                self.stats["throttled"] += 1
+                return 429, "Rate limit reached."
+            if roll < self.throttle_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 500, "The server had an error while processing your request."
+            self.active += 1
+            return None
+
+    def add_file(self, filename, data, purpose):
+        with self.lock:
+            file_id = f"file-{uuid.uuid4().hex}"
+            self.files[file_id] = (filename, data)
+        return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def create_batch(self, request):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": request["endpoint"], "errors": None,
+            "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+            "status": "in_progress", "output_file_id": None, "error_file_id": None,
+            "created_at": int(time.time()), "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": request.get("metadata"),
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        threading.Timer(self.batch_delay, self._run_batch, args=(batch_id,)).start()
+        return batch
+
+    def _run_batch(self, batch_id):
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] != "in_progress":
+                return
+            _, data = self.files[batch["input_file_id"]]
+            if self.batch_status != "completed":
+                batch.update(
+                    status=self.batch_status, failed_at=int(time.time()),
+                    errors={"object": "list", "data": [{"code": "mock_failure", "message": "Mock batch failure."}]},
+                )
+                return
+        outputs, errors = [], []
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if self.random.random() < self.error_rate:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"],
+                               "response": {"status_code": 500, "body": {"error": {"message": "Mock failure."}}},
+                               "error": None})
+                continue
+            body = completion_body(request["body"], self.completion_tokens)
+            self.done_tokens(body["usage"])
+            outputs.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"],
+                            "response": {"status_code": 200, "body": body}, "error": None})
+
+        def jsonl(records):
+            return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+        output_file = self.add_file("output.jsonl", jsonl(outputs), "batch_output")["id"]
+        error_file = self.add_file("errors.jsonl", jsonl(errors), "batch_output")["id"] if errors else None
+        with self.lock:
+            batch.update(
+                status="completed", output_file_id=output_file, error_file_id=error_file,
+                completed_at=int(time.time()),
+                request_counts={"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)},
+            )
+
+    def done_tokens(self, usage):
+        with self.lock:
+            self.stats["prompt_tokens"] += usage["prompt_tokens"]
+            self.stats["completion_tokens"] += usage["completion_tokens"]
+
+    def done(self, prompt_tokens, completion_tokens):
+        with self.lock:
+            self.active -= 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.strip("/").split("/")
+        if parts == ["stats"]:
+            with server.lock:
+                self._send_json(200, dict(server.stats, active=server.active))
+        elif parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in server.batches:
+            with server.lock:
+                self._send_json(200, dict(server.batches[parts[2]]))
+        elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"] and parts[2] in server.files:
+            _, data = server.files[parts[2]]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        parts = self.path.strip("/").split("/")
+        if parts == ["v1", "files"]:
+            fields = parse_multipart(self.headers["Content-Type"], body)
+            filename, data = fields["file"]
+            self._send_json(200, server.add_file(filename, data, fields["purpose"][1].decode()))
+            return
+        if parts == ["v1", "batches"]:
+            self._send_json(200, server.create_batch(json.loads(body)))
+            return
+        if parts[:2] == ["v1", "batches"] and parts[3:] == ["cancel"] and parts[2] in server.batches:
+            with server.lock:
+                batch = server.batches[parts[2]]
+                if batch["status"] == "in_progress":
+                    batch["status"] = "cancelled"
+                self._send_json(200, dict(batch))
+            return
+        if parts != ["v1", "chat", "completions"]:
+            self._not_found()
+            return
+        request = json.loads(body or b"{}")
+
+        failure = server.admit()
+        if failure is not None:
+            status, message = failure
+            headers = [("retry-after-ms", str(int(server.retry_after * 1000)))] if status == 429 else []
+            self._send_json(status, {"error": {"message": message, "type": "mock_error", "code": status}}, headers)
+            return
+
+        completion = completion_body(request, server.completion_tokens)
+        answer = completion["choices"][0]["message"]["content"]
+        usage = completion["usage"]
+        prompt_tokens, completion_tokens = usage["prompt_tokens"], usage["completion_tokens"]
+        model = completion["model"]
+        completion_id = completion["id"]
+        token_time = 1 / server.tokens_per_second if server.tokens_per_second else 0.0
+        try:
+            time.sleep(server.latency)
+            if not request.get("stream"):
+                time.sleep(completion_tokens * token_time)
+                self._send_json(200, completion)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def event(choices, chunk_usage=None):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": choices}
+                if chunk_usage is not None:
+                    chunk["usage"] = chunk_usage
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+            # Stream about four characters (one token) per chunk at the configured rate
+            pieces = re.findall(r".{1,4}", answer, re.S)
+            for piece in pieces:
+                event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                time.sleep(token_time)
+            event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event([], usage)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        finally:
+            server.done(prompt_tokens, completion_tokens)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Token rate; 0 for instant answers.")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Length of generated content.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with a 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests rejected with a 429.")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Reject requests beyond this many with a 429.")
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="Seconds before a batch completes.")
+    parser.add_argument(
+        "--batch-status", default="completed", choices=["completed", "failed", "expired", "cancelled"],
+        help="Terminal status of every batch; anything but completed produces no output.",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = MockOpenAIServer(
+        args.host, args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        max_concurrency=args.max_concurrency, batch_delay=args.batch_delay,
+        batch_status=args.batch_status, seed=args.seed,
+    )
+    print(f"Mock OpenAI API listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
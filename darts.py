@@ -1,71 +1,156 @@
 import streamlit as st
-import openai
-import fitz  # PyMuPDF for PDF text extraction
-from docx import Document  # python-docx for Word files
-import re  # Import regex for pattern matching
-import base64  # For encoding download content
-
-st.markdown(
-    """
-    <style>
-    .st-emotion-cache-12fmjuu.ezrtsby2 {
-        display: none;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
+import os
+import time
+import uuid
+
+from darts_core.clustering import DEFAULT_SIMILARITY_THRESHOLD, cluster_darts, representatives
+from darts_core.concurrency import DEFAULT_MAX_WORKERS, TaskResult
+from darts_core.documents import DocumentParseError, DocumentTextCache
+from darts_core.export import EXPORT_FORMATS, ZIP_MIME, export_name, export_zip_bytes, variant_records
+from darts_core.gateway import LLMGateway
+from darts_core.graph import DependencyGraph
+from darts_core.jobs import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    JOB_EXTRACT_DARTS,
+    JOB_GENERATE_VARIANT,
+    PENDING_STATES,
+    QUEUED,
+    JobQueue,
+    register_pipeline_jobs,
 )
-
-st.markdown(
-    """
-    <style>
-    .logo-container {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        margin-bottom: 20px;
-    }
-    .logo-container img {
-        width: 300px;
-    }
-    .app-container {
-        border-left: 5px solid #58258b;
-        border-right: 5px solid #58258b;
-        padding-left: 15px;
-        padding-right: 15px;
-    }
-    .stTextArea, .stTextInput, .stMultiSelect, .stSlider {
-        color: #42145f;
-    }
-    .stButton button {
-        background-color: #fec923;
-        color: #42145f;
-    }
-    .stButton button:hover {
-        background-color: #42145f;
-        color: #fec923;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
+from darts_core.llm import LLMClient
+from darts_core.llm_cache import CACHE_BYPASS, CACHE_REFRESH, CACHE_USE, CompletionCache
+from darts_core.metrics import STAGE_REVISION, MetricsRecorder
+from darts_core.pipeline import (
+    GENERIC_DARTS,
+    build_revision_prompt,
+    clean_generated_text,
+    schedule_variants,
+    summarize_brand,
 )
+from darts_core.preprocess import clean_document, cleaning_summary, join_pages
+from darts_core.retrieval import DEFAULT_CONTEXT_TOKENS
+from darts_core.revision import plan_revision, revise_paragraphs
+from darts_core.store import BRAND_SUMMARY, DARTS, VARIANT, ProjectStore, input_hash
 
-st.markdown(
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+LOGO_FILE = "logo.jpg"
+REMOTE_LOGO_URL = "https://media.freemalaysiatoday.com/wp-content/uploads/2023/12/6a15ae07-ai-freepik.jpg"
+
+@st.cache_resource
+def page_header_html():
+    """Build the page styles and logo markup once per server process.
+
+    The styles come from static/darts.css. The logo is not shipped with the app and is loaded
+    from REMOTE_LOGO_URL unless a static/logo.jpg has been added to the deployment.
     """
-    <div class="logo-container">
-        <img src="https://media.freemalaysiatoday.com/wp-content/uploads/2023/12/6a15ae07-ai-freepik.jpg" alt="Logo">
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+    with open(os.path.join(STATIC_DIR, "darts.css"), encoding="utf-8") as handle:
+        styles = handle.read()
+    # A local copy is served by Streamlit's static file serving (.streamlit/config.toml)
+    logo = f"app/static/{LOGO_FILE}" if os.path.exists(os.path.join(STATIC_DIR, LOGO_FILE)) else REMOTE_LOGO_URL
+    return (
+        f"<style>\n{styles}</style>\n"
+        f'<div class="logo-container"><img src="{logo}" alt="Logo"></div>\n'
+        f'<div class="app-container">'
+    )
 
-st.markdown('<div class="app-container">', unsafe_allow_html=True)
+st.markdown(page_header_html(), unsafe_allow_html=True)
+
+@st.cache_resource
+def get_llm_gateway():
+    """Create the process-wide LLM gateway, with the OpenAI API key, shared by every session."""
+    return LLMGateway(api_key=st.secrets["OPENAI_API_KEY"])
+
+@st.cache_resource
+def get_completion_cache():
+    """Open the on-disk completion cache once per server process."""
+    return CompletionCache()
+
+@st.cache_resource
+def get_document_cache():
+    """Share parsed document text across reruns and sessions."""
+    return DocumentTextCache()
+
+@st.cache_resource
+def get_metrics():
+    """Collect LLM call metrics for every session in this server process."""
+    return MetricsRecorder()
+
+@st.cache_resource
+def get_project_store():
+    """Open the on-disk project store once per server process."""
+    return ProjectStore()
+
+@st.cache_resource
+def get_job_queue():
+    """Start the process-wide background job queue that runs extraction and generation."""
+    gateway, cache, metrics = get_llm_gateway(), get_completion_cache(), get_metrics()
+    queue = JobQueue()
+    register_pipeline_jobs(
+        queue,
+        lambda payload: LLMClient(
+            gateway, cache=cache, cache_mode=payload["cache_mode"], session=payload["session"], metrics=metrics
+        ),
+        get_project_store(),
+    )
+    queue.start()
+    return queue
+
+JOB_POLL_INTERVAL = 1.0  # Seconds between reruns while background jobs are pending
+GRID_COLUMNS = 3  # Content pieces shown side by side per Dart
+
+# Client project whose results are saved and restored
+store = get_project_store()
+project = st.sidebar.selectbox(
+    "Client project",
+    store.list_projects() or ["Default"],
+    accept_new_options=True,
+    help="Pick a saved client project or type a new name. Results are saved to the project as they are produced.",
+)
 
-# Set OpenAI API Key
-openai.api_key = st.secrets["OPENAI_API_KEY"]
+# Per-project dependency graph: a rerun only recomputes the nodes whose inputs changed
+graph = st.session_state.setdefault("pipeline_graphs", {}).setdefault(project, DependencyGraph())
+graph.begin_run()
+
+# Response cache controls
+cache_modes = {
+    "Use cached responses": CACHE_USE,
+    "Refresh cached responses": CACHE_REFRESH,
+    "Bypass cache": CACHE_BYPASS,
+}
+cache_choice = st.sidebar.radio("AI response cache", list(cache_modes))
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+llm = LLMClient(
+    get_llm_gateway(),
+    cache=get_completion_cache(),
+    cache_mode=cache_modes[cache_choice],
+    session=st.session_state["session_id"],
+    metrics=get_metrics(),
+)
+max_workers = st.sidebar.slider("Parallel AI requests", min_value=1, max_value=16, value=DEFAULT_MAX_WORKERS)
+structured_extraction = st.sidebar.checkbox("Extract all Darts in a single request", value=True)
+context_tokens = st.sidebar.number_input(
+    "Document context per Dart (tokens)", min_value=500, max_value=120_000, value=DEFAULT_CONTEXT_TOKENS, step=500,
+    disabled=structured_extraction,
+)
+scoped_revisions = st.sidebar.checkbox(
+    "Revise only the affected paragraphs", value=True,
+    help="Send only the paragraphs a revision instruction concerns, instead of the whole variant.",
+)
+group_similar_darts = st.sidebar.checkbox(
+    "Generate once per group of similar Darts", value=False,
+    help="Darts with near-identical names or details share one generated variant.",
+)
+similarity_threshold = st.sidebar.slider(
+    "Dart similarity threshold", min_value=0.3, max_value=1.0, value=DEFAULT_SIMILARITY_THRESHOLD, step=0.05,
+    disabled=not group_similar_darts,
+)
 
 # List of generic Darts (color-based) to exclude
-generic_darts = ["Red", "Green", "Blue", "Yellow", "Purple", "Orange", "Pink", "Beige", "Silver", "Maroon"]
+generic_darts = GENERIC_DARTS
 
 # Initialize session state for user inputs
 if "content_to_revise" not in st.session_state:
@@ -77,164 +162,114 @@ if 'generated_darts' not in st.session_state:
 if 'revised_darts' not in st.session_state:
     st.session_state['revised_darts'] = []
 
+# Background jobs this page is waiting for; the page reruns until they finish
+jobs = get_job_queue()
+pending_jobs = []
+
 # Helper Functions
 def extract_text(document):
-    """Extract text from PDF or Word documents."""
-    if document.type == "application/pdf":
-        return extract_text_from_pdf(document)
-    elif document.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return extract_text_from_word(document)
-    else:
-        return document.getvalue().decode("utf-8")
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF using PyMuPDF."""
-    text = ""
+    """Extract text from PDF or Word documents, parsing each distinct upload only once."""
     try:
-        with fitz.open(stream=pdf_file.read(), filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text()
-    except Exception:
-        text = ""
+        return get_document_cache().get_text(document.getvalue(), document.type)
+    except DocumentParseError as error:
+        st.error(f"Could not read {document.name}: {error.__cause__ or error}")
+        st.stop()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def clean_text(text, dedupe=True):
+    """Strip boilerplate and duplicate paragraphs from document text once per distinct text."""
+    return clean_document(text, dedupe=dedupe)
+
+def prepare_text(text, dedupe=True):
+    """Return cleaned document text for prompts, noting the tokens cleaning saved."""
+    cleaned = clean_text(text, dedupe)
+    if cleaned.tokens_before > cleaned.tokens_after:
+        st.caption(cleaning_summary(cleaned))
+    return cleaned.text
+
+def split_dart_group(key, group, overrides):
+    """Let every Dart removed from a group's multiselect stand alone."""
+    for dart in group:
+        if dart not in st.session_state[key]:
+            overrides[dart] = dart
+
+def merge_darts(overrides):
+    """Move the Dart picked in the merge controls into the group of the chosen target."""
+    overrides[st.session_state["merge_dart"]] = st.session_state["merge_target"]
+
+def show_dart_groups(darts, groups, overrides):
+    """Show the groups of similar Darts with controls to split or merge them."""
+    with st.expander(f"Similar Darts: {len(darts)} Darts share {len(groups)} variants per content piece"):
+        shared = [group for group in groups if len(group) > 1]
+        for group in shared:
+            key = f"dart_group_{input_hash(*group)}"
+            st.multiselect(
+                f"Generated once for '{group[0]}'", group, default=group, key=key,
+                on_change=split_dart_group, args=(key, group, overrides),
+                help="Remove a Dart to generate its own variant.",
+            )
+        if not shared:
+            st.caption("No similar Darts at this threshold; every Dart gets its own variant.")
+        merge_column, target_column = st.columns(2)
+        merge_column.selectbox("Merge Dart", list(darts), key="merge_dart")
+        target_column.selectbox("into the group of", list(darts), key="merge_target")
+        merge_column.button("Merge", on_click=merge_darts, args=(overrides,))
+        target_column.button("Reset groups", on_click=overrides.clear, disabled=not overrides)
+
+def show_content(target, text):
+    """Render text in the shaded content box inside a Streamlit container or placeholder."""
+    target.write(f"<div style='background-color: #f0f0f0; padding: 10px; border-radius: 5px;'>{text}</div>", unsafe_allow_html=True)
+
+def stream_into(target, chunks, min_interval=0.1):
+    """Render a stream of text chunks into a placeholder as they arrive and return the cleaned full text."""
+    parts = []
+    last_render = 0.0
+    for chunk in chunks:
+        parts.append(chunk)
+        if time.monotonic() - last_render >= min_interval:
+            show_content(target, clean_generated_text("".join(parts)))
+            last_render = time.monotonic()
+    text = clean_generated_text("".join(parts))
+    show_content(target, text)
     return text
 
-def extract_text_from_word(word_file):
-    """Extract text from Word document using python-docx."""
-    try:
-        doc = Document(word_file)
-        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
-    except Exception:
-        return ""
-
-def format_with_spacing(text):
-    """Ensure appropriate spacing and formatting in the text."""
-    paragraphs = [line.strip() for line in text.split('\n') if line.strip()]
-    return '\n\n'.join(paragraphs)
-
-def remove_bullets(text):
-    """Remove bullet points, numbered lists, or special characters from the beginning of each line."""
-    cleaned_text = '\n'.join([re.sub(r'^\d+\.\s*|^[\-*•]\s*', '', line).strip() for line in text.splitlines() if line.strip()])
-    return cleaned_text.replace('*', '')
-
-def parse_brand_elements(details_text):
-    """Parse and separate brand elements from the response."""
-    brand_elements = {
-        "Brand Voice": "",
-        "Brand Positioning": "",
-        "Unique Value Propositions": ""
-    }
-
-    # Use regex to find sections and their content
-    brand_voice_match = re.search(r'Brand Voice:(.*?)(?=Brand Positioning:|Unique Value Propositions:|$)', details_text, re.S)
-    brand_positioning_match = re.search(r'Brand Positioning:(.*?)(?=Unique Value Propositions:|$)', details_text, re.S)
-    unique_value_propositions_match = re.search(r'Unique Value Propositions:(.*)', details_text, re.S)
-
-    if brand_voice_match:
-        brand_elements["Brand Voice"] = brand_voice_match.group(1).strip()
-    if brand_positioning_match:
-        brand_elements["Brand Positioning"] = brand_positioning_match.group(1).strip()
-    if unique_value_propositions_match:
-        brand_elements["Unique Value Propositions"] = unique_value_propositions_match.group(1).strip()
-
-    # Clean up any non-essential characters
-    for key in brand_elements:
-        brand_elements[key] = remove_bullets(brand_elements[key])
-
-    # Ensure no section is marked as "No information available" if it contains content
-    for key, value in brand_elements.items():
-        if not value:
-            brand_elements[key] = "No information available."
-
-    return brand_elements
-
-def extract_dart_names(document):
-    """Extract only the names of specific Darts (excluding generic and color-based ones) from the document."""
-    content = extract_text(document)
-    prompt = (
-        f"List only the names of each Dart mentioned in the following document. Do not include any descriptions, "
-        f"characteristics, or psychographic drivers, just list the Dart names as a numbered list:\n\n{content}"
-    )
-
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    dart_names = [
-        line.strip() for line in response.choices[0].message.content.splitlines()
-        if line.strip() and all(color not in line for color in generic_darts)
-    ]
-    return dart_names
-
-def extract_dart_details(document, dart_name):
-    """For each Dart name, extract characteristics and psychographic drivers."""
-    content = extract_text(document)
-    prompt = (
-        f"Provide only the characteristics and psychographic drivers for the Dart '{dart_name}' based on the following "
-        f"document content. Use this format:\n\n"
-        f"- Characteristics: (list characteristics here)\n"
-        f"- Psychographic Drivers: (list psychographic drivers here)\n\n"
-        f"Document content:\n\n{content}"
-    )
-
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    details_text = response.choices[0].message.content.strip()
-    characteristics = ""
-    psychographic_drivers = ""
-
-    if "Characteristics:" in details_text:
-        characteristics = details_text.split("Characteristics:", 1)[1].split("Psychographic Drivers:", 1)[0].strip().strip("*-")
-    if "Psychographic Drivers:" in details_text:
-        psychographic_drivers = details_text.split("Psychographic Drivers:", 1)[1].strip().strip("*-")
-
-    return {
-        "Characteristics": remove_bullets(characteristics),
-        "Psychographic Drivers": remove_bullets(psychographic_drivers)
-    }
-
-def extract_all_darts(document):
-    """Combine functions to extract all specific Darts and their details one by one."""
-    darts = {}
-    dart_names = extract_dart_names(document)
-
-    for dart_name in dart_names:
-        dart_details = extract_dart_details(document, dart_name)
-        darts[dart_name] = dart_details
-
-    return darts
-
-def generate_content_for_dart(content, brand_summary, dart_characteristics):
-    """Generate content tailored for a specific Dart, considering brand guidelines."""
-
-    brand_voice = brand_summary["Brand Voice"]
-    brand_positioning = brand_summary["Brand Positioning"]
-    unique_value_propositions = brand_summary["Unique Value Propositions"]
-
-    prompt = (
-        f"Rewrite the following content to appeal to an audience with these characteristics: {dart_characteristics}. "
-        f"Ensure the content reflects the brand voice, positioning, and unique value propositions as described:\n\n"
-        f"- Brand Voice: {brand_voice}\n"
-        f"- Brand Positioning: {brand_positioning}\n"
-        f"- Unique Value Propositions: {unique_value_propositions}\n\n"
-        f"Here is the original content:\n\n{content}\n\nDo not use any emojis."
-    )
+def download_text(target, text, filename, key):
+    """Render a button that downloads text as a file without rerunning the app."""
+    target.download_button(f"Download {filename}", text, file_name=filename, mime="text/plain", key=key, on_click="ignore")
 
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
+def background_job(kind, key, payload):
+    """Return the newest job for this project and key, submitting one if there is none yet."""
+    job = jobs.find(kind, project, key)
+    if job is None:
+        job = jobs.get(jobs.submit(kind, payload, project=project, key=key))
+    return job
 
-    return format_with_spacing(remove_bullets(response.choices[0].message.content.strip()))
+def show_job_status(target, job, label):
+    """Render a job that is not done yet, with controls to cancel, run it next or retry it.
 
-def create_download_link(text, filename):
-    """Create an HTML link to download a text file."""
-    b64 = base64.b64encode(text.encode()).decode()  # Encode to base64
-    href = f'<a href="data:text/plain;base64,{b64}" download="{filename}">Download {filename}</a>'
-    return href
+    Returns the job that should be shown from now on, which is a new one after a retry.
+    """
+    status = job["status"]
+    if status in PENDING_STATES:
+        pending_jobs.append(job["id"])
+        cancel_column, first_column = target.columns(2)
+        if cancel_column.button("Cancel", key=f"cancel_job_{job['id']}"):
+            jobs.cancel(job["id"])
+        if status == QUEUED and first_column.button("Run next", key=f"prioritise_job_{job['id']}"):
+            jobs.prioritise(job["id"])
+        if job["cancel_requested"]:
+            target.caption(f"{label}: cancelling...")
+        elif status == QUEUED:
+            target.caption(f"{label}: waiting in the queue...")
+    else:
+        if status == FAILED:
+            target.error(f"{label} failed: {job['error']}")
+        elif status == CANCELLED:
+            target.warning(f"{label} was cancelled.")
+        if target.button("Retry", key=f"retry_job_{job['id']}"):
+            job = jobs.get(jobs.submit(job["kind"], job["payload"], project=job["project"], key=job["key"]))
+            pending_jobs.append(job["id"])
+    return job
 
 # Main Script
 st.title("Darts at Scale")
@@ -244,83 +279,349 @@ st.subheader("Client's Brand and Style Guide")
 brand_style_guide = st.file_uploader("Upload a PDF or Word document (optional)", type=["pdf", "docx", "txt"])
 manual_brand_input = st.text_area("Or, enter brand voice, positioning, and unique value propositions manually if no file is uploaded:")
 
+brand_summary = None
 if brand_style_guide or manual_brand_input:
-    content = extract_text(brand_style_guide) if brand_style_guide else manual_brand_input
-    prompt = (
-        f"Extract the brand voice, brand positioning, and unique value propositions from the following brand guidelines. "
-        f"Structure the response as follows:\n\n"
-        f"- Brand Voice:\n- Brand Positioning:\n- Unique Value Propositions:\n\n"
-        f"Brand Guidelines Content:\n\n{content}"
-    )
-    
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    
-    brand_summary = parse_brand_elements(response.choices[0].message.content.strip())
-    
-    if brand_summary:
-        st.write("**Brand Voice:**")
-        st.write(brand_summary["Brand Voice"])
-        st.write("**Brand Positioning:**")
-        st.write(brand_summary["Brand Positioning"])
-        st.write("**Unique Value Propositions:**")
-        st.write(brand_summary["Unique Value Propositions"])
+    content = prepare_text(extract_text(brand_style_guide)) if brand_style_guide else manual_brand_input
+    brand_hash = input_hash(content)
+
+    def load_or_summarize_brand():
+        """Load this guide's brand summary from the project, or extract it with one LLM call."""
+        summary = store.load(project, BRAND_SUMMARY, brand_hash)
+        if summary is None:
+            summary = summarize_brand(llm, content)
+            store.save(project, BRAND_SUMMARY, brand_hash, summary)
+        return summary
+
+    brand_summary = graph.resolve("brand_summary", load_or_summarize_brand, inputs=(brand_hash,))
+else:
+    saved_brand = store.latest(project, BRAND_SUMMARY)
+    if saved_brand:
+        brand_summary = graph.resolve("brand_summary", lambda: saved_brand[1], inputs=(saved_brand[0],))
+        st.caption(f"Showing the brand summary saved in '{project}'. Upload a guide to replace it.")
+
+if brand_summary:
+    st.write("**Brand Voice:**")
+    st.write(brand_summary["Brand Voice"])
+    st.write("**Brand Positioning:**")
+    st.write(brand_summary["Brand Positioning"])
+    st.write("**Unique Value Propositions:**")
+    st.write(brand_summary["Unique Value Propositions"])
 
 # Step 2: Upload client's Darts document
 st.subheader("Client's Darts Document")
 darts_doc = st.file_uploader("Upload Darts document", type=["pdf", "docx", "txt"])
 
-if darts_doc:
-    darts = extract_all_darts(darts_doc)
-    st.session_state['generated_darts'] = darts
-    st.write("**Client's Darts:**")
-    for dart, details in darts.items():
-        if details["Characteristics"] != "No information available." or details["Psychographic Drivers"] != "No information available.":
-            st.write(f"**{dart}**")
+dart_placeholders = []
+
+def reserve_dart_placeholders(dart_names):
+    """Reserve one slot per Dart so results render in document order as they arrive."""
+    for dart in dart_names:
+        placeholder = st.empty()
+        placeholder.caption(f"Extracting details for {dart}...")
+        dart_placeholders.append(placeholder)
+
+def show_dart_details(result):
+    """Render one Dart's details, or a warning if its extraction failed."""
+    placeholder = dart_placeholders[result.index]
+    if result.error is not None:
+        placeholder.warning(f"Could not extract details for {result.item}: {result.error}")
+        return
+    details = result.value
+    if details["Characteristics"] != "No information available." or details["Psychographic Drivers"] != "No information available.":
+        with placeholder.container():
+            st.write(f"**{result.item}**")
             st.write(f"Characteristics:\n{details['Characteristics']}")
             st.write(f"Psychographic Drivers:\n{details['Psychographic Drivers']}")
+    else:
+        placeholder.empty()
+
+def show_saved_darts(darts):
+    """Render Darts loaded from the project store."""
+    reserve_dart_placeholders(list(darts))
+    for index, (dart, details) in enumerate(darts.items()):
+        show_dart_details(TaskResult(index, dart, details, None))
+
+if darts_doc:
+    st.write("**Client's Darts:**")
+    # Darts often share wording on purpose, so only boilerplate is stripped, not duplicate paragraphs
+    darts_text = prepare_text(extract_text(darts_doc), dedupe=False)
+    darts_hash = input_hash(darts_text, structured_extraction, None if structured_extraction else context_tokens)
+    darts_fingerprint = graph.fingerprint(inputs=(darts_hash,))
+    darts = graph.get("darts", darts_fingerprint)
+    if darts is None:
+        darts = store.load(project, DARTS, darts_hash)
+        if darts is None:
+            # Extraction runs as a background job; the page polls it until the Darts are ready
+            job = background_job(JOB_EXTRACT_DARTS, darts_hash, {
+                "project": project,
+                "input_hash": darts_hash,
+                "label": darts_doc.name,
+                "text": darts_text,
+                "generic_darts": generic_darts,
+                "max_workers": max_workers,
+                "structured": structured_extraction,
+                "context_tokens": context_tokens,
+                "cache_mode": llm.cache_mode,
+                "session": llm.session,
+            })
+            if job["status"] == DONE:
+                darts = job["result"]
+            else:
+                if job["status"] in PENDING_STATES:
+                    st.caption(f"Extracting Darts... {job['progress'] or ''}")
+                show_job_status(st, job, "Dart extraction")
+        if darts is not None:
+            graph.set("darts", darts_fingerprint, darts)
+    if darts is not None:
+        show_saved_darts(darts)
+    st.session_state['generated_darts'] = darts or {}
+else:
+    saved_darts = store.latest(project, DARTS)
+    if saved_darts:
+        st.write("**Client's Darts:**")
+        st.caption(f"Showing the Darts saved in '{project}'. Upload a document to replace them.")
+        darts = graph.resolve("darts", lambda: saved_darts[1], inputs=(saved_darts[0],))
+        show_saved_darts(darts)
+        st.session_state['generated_darts'] = darts
 
 # Step 3: Upload content for Dart-specific personalization
 st.subheader("Content Personalization for All Darts")
-content_doc = st.file_uploader("Upload sample content (e.g., an email)", type=["pdf", "docx", "txt"])
+content_docs = st.file_uploader(
+    "Upload sample content (e.g., emails)", type=["pdf", "docx", "txt"], accept_multiple_files=True
+)
 
-if content_doc and 'generated_darts' in st.session_state:
-    original_content = extract_text(content_doc)
-    st.write("**Original Content:**")
-    st.write(f"<div style='background-color: #f0f0f0; padding: 10px; border-radius: 5px;'>{original_content}</div>", unsafe_allow_html=True)
+if content_docs and st.session_state['generated_darts'] and brand_summary is None:
+    st.warning("Add a brand guide or brand details in Step 1 before generating content.")
+elif content_docs and st.session_state['generated_darts']:
+    content_pieces = {document.name: join_pages(extract_text(document)) for document in content_docs}
+    unique_pieces = len(set(content_pieces.values()))
+    if len(content_pieces) == 1:
+        st.write("**Original Content:**")
+        show_content(st, next(iter(content_pieces.values())))
+    else:
+        with st.expander(f"Original content: {len(content_pieces)} pieces ({unique_pieces} unique)"):
+            for content_name, original_content in content_pieces.items():
+                st.write(f"**{content_name}**")
+                show_content(st, original_content)
+    selected_content = next(iter(content_pieces))
+    if len(content_pieces) > 1:
+        selected_content = st.selectbox("Content piece to download and revise", list(content_pieces))
 
     # Generate Dart-specific content and provide download links immediately below each section
     st.subheader("Generated Content for Each Dart")
-    for dart, details in st.session_state['generated_darts'].items():
-        dart_characteristics = details["Characteristics"]
-        generated_content = generate_content_for_dart(original_content, brand_summary, dart_characteristics)
-        st.write(f"**Content for Dart - {dart}:**")
-        st.write(f"<div style='background-color: #f0f0f0; padding: 10px; border-radius: 5px;'>{generated_content}</div>", unsafe_allow_html=True)
-
-        # Create a hyperlink for downloading the first draft
-        download_link = create_download_link(generated_content, f"{dart.replace(' ', '_')}_content.txt")
-        st.markdown(download_link, unsafe_allow_html=True)
+    darts = st.session_state['generated_darts']
+    dart_items = list(darts.items())
+    # Near-duplicate Darts share one variant; user splits and merges are kept per project
+    dart_groups = [[dart] for dart in darts]
+    if group_similar_darts:
+        group_overrides = st.session_state.setdefault("dart_group_overrides", {}).setdefault(project, {})
+        dart_groups = cluster_darts(darts, similarity_threshold, group_overrides)
+        show_dart_groups(darts, dart_groups, group_overrides)
+    generated_for = representatives(dart_groups)
+    total_cells = len(dart_items) * len(content_pieces)
+    generation_progress = st.progress(0.0, text=f"Generating {total_cells} variants...")
+
+    # One container per Dart holding a grid cell per content piece. Work is scheduled Dart by
+    # Dart, so consecutive requests share the brand and Dart prompt prefix, and identical content
+    # pieces and grouped Darts share one variant. Saved variants show straight away; the others are generated by
+    # background jobs that the page polls, filling in cells as they complete.
+    dart_containers = {}
+    cells = {}
+    for dart, _ in dart_items:
+        container = st.container()
+        container.write(f"**Content for Dart - {dart}:**")
+        if generated_for[dart] != dart:
+            container.caption(f"Uses the variant generated for the similar Dart '{generated_for[dart]}'.")
+        dart_containers[dart] = container
+        content_names = list(content_pieces)
+        for row_start in range(0, len(content_names), GRID_COLUMNS):
+            row = content_names[row_start:row_start + GRID_COLUMNS]
+            for column, content_name in zip(container.columns(len(row)) if len(content_names) > 1 else [container], row):
+                if len(content_names) > 1:
+                    column.caption(content_name)
+                cells[(dart, content_name)] = (column, column.empty())
+
+    variants = {}
+    pending_cells = []
+    shown_jobs = {}  # Darts with the same characteristics share a job; its controls are rendered once
+    for dart, targets in schedule_variants(content_pieces, darts, clusters=dart_groups):
+        details = darts[dart]
+        original_content = content_pieces[targets[0][1]]
+        variant_hash = input_hash(original_content, brand_summary, details["Characteristics"])
+        variant_fingerprint = graph.fingerprint(
+            inputs=(input_hash(original_content), details["Characteristics"]), deps=["brand_summary"]
+        )
+        variant_node = ("variant", *targets[0])
+        column, placeholder = cells[targets[0]]
+        saved_variant = graph.get(variant_node, variant_fingerprint)
+        # Graph hits are already recorded; setting them again would report them as recomputed
+        recorded = saved_variant is not None
+        if saved_variant is None:
+            saved_variant = store.load(project, VARIANT, variant_hash)
+            if saved_variant is None:
+                job = background_job(JOB_GENERATE_VARIANT, variant_hash, {
+                    "project": project,
+                    "input_hash": variant_hash,
+                    "dart": dart,
+                    "content": original_content,
+                    "brand_summary": brand_summary,
+                    "characteristics": details["Characteristics"],
+                    "cache_mode": llm.cache_mode,
+                    "session": llm.session,
+                })
+                if job["status"] == DONE:
+                    saved_variant = job["result"]
+                else:
+                    for target in targets:
+                        if job["progress"]:
+                            show_content(cells[target][1], clean_generated_text(job["progress"]))
+                        elif job["status"] in PENDING_STATES:
+                            cells[target][1].caption("Generating content...")
+                    if job["id"] in shown_jobs:
+                        job = shown_jobs[job["id"]]
+                    else:
+                        shown_job = show_job_status(column, job, f"Content for {dart}")
+                        shown_jobs[job["id"]] = shown_jobs[shown_job["id"]] = shown_job
+                        job = shown_job
+                    if job["status"] in PENDING_STATES:
+                        pending_cells.extend(targets)
+        if saved_variant is not None:
+            for target in targets:
+                if not recorded:
+                    graph.set(("variant", *target), variant_fingerprint, saved_variant)
+                variants[target] = (variant_hash, saved_variant)
+                show_content(cells[target][1], saved_variant)
+
+    # Show how many variants are done and which Darts are still generating
+    done = len(variants)
+    pending_darts = list(dict.fromkeys(dart for dart, _ in pending_cells))
+    status = f"Still generating: {', '.join(pending_darts)}" if pending_darts else "All variants generated."
+    if done + len(pending_cells) < total_cells:
+        status = f"{status} Some variants could not be generated."
+    generation_progress.progress(done / max(total_cells, 1), text=f"{done}/{total_cells} variants done. {status}")
+
+    export_records = []
+    for dart, _ in dart_items:
+        container = dart_containers[dart]
+        for content_name in content_pieces:
+            if (dart, content_name) in variants and content_name != selected_content:
+                variant_hash, generated_content = variants[(dart, content_name)]
+                export_records.extend(variant_records(
+                    dart, content_name, generated_content, store.revisions(project, dart, variant_hash)
+                ))
+        if (dart, selected_content) not in variants:
+            continue
+        variant_hash, generated_content = variants[(dart, selected_content)]
+        if len(content_pieces) > 1:
+            container.caption(f"Download and revise: {selected_content}")
+
+        # Download button for the first draft
+        download_text(container, generated_content, f"{dart.replace(' ', '_')}_content.txt", key=f"download_{dart}")
 
         # Revision functionality
-        revision_input = st.text_input(f"Enter revision instructions for '{dart}':", key=f"revision_input_{dart}")
-        if st.button(f"Revise Content for '{dart}'", key=f"revise_button_{dart}"):
+        revision_input = container.text_input(f"Enter revision instructions for '{dart}':", key=f"revision_input_{dart}")
+        if container.button(f"Revise Content for '{dart}'", key=f"revise_button_{dart}"):
             if revision_input:
-                revision_prompt = (
-                    f"Revise the following content based on these instructions:\n\n"
-                    f"Instructions: {revision_input}\n\n"
-                    f"Content:\n{generated_content}\n\nDo not use any emojis."
+                container.write(f"**Revised Content for '{dart}':**")
+                revision_fingerprint = graph.fingerprint(
+                    inputs=(revision_input, scoped_revisions), deps=[("variant", dart, selected_content)]
                 )
-                revision_response = openai.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": revision_prompt}]
+                revised_content = graph.get(("revision", dart), revision_fingerprint)
+                if revised_content is None:
+                    paragraphs, targets = None, None
+                    if scoped_revisions:
+                        paragraphs, targets = plan_revision(llm, generated_content, revision_input, dart=dart)
+                    if targets is not None:
+                        try:
+                            revised_content = revise_paragraphs(llm, paragraphs, targets, revision_input, dart=dart)
+                            show_content(container, revised_content)
+                            container.caption(
+                                f"Revised paragraph {', '.join(str(index + 1) for index in targets)} of {len(paragraphs)}."
+                            )
+                        except ValueError:
+                            revised_content = None  # The model did not return every paragraph; revise it all
+                    if revised_content is None:
+                        revision_prompt = build_revision_prompt(generated_content, revision_input)
+                        revised_content = stream_into(
+                            container.empty(), llm.stream(revision_prompt, stage=STAGE_REVISION, dart=dart)
+                        )
+                    graph.set(("revision", dart), revision_fingerprint, revised_content)
+                    st.session_state['revised_darts'].append((dart, revised_content))
+                    store.add_revision(project, dart, variant_hash, revision_input, revised_content)
+                else:
+                    show_content(container, revised_content)
+
+                # Download button for the revised content
+                download_text(
+                    container, revised_content, f"{dart.replace(' ', '_')}_revised.txt", key=f"download_revised_{dart}"
                 )
-                revised_content = format_with_spacing(remove_bullets(revision_response.choices[0].message.content.strip()))
-                st.session_state['revised_darts'].append((dart, revised_content))
-                st.write(f"**Revised Content for '{dart}':**")
-                st.write(f"<div style='background-color: #f0f0f0; padding: 10px; border-radius: 5px;'>{revised_content}</div>", unsafe_allow_html=True)
-
-                # Create a hyperlink for downloading the revised content
-                revised_download_link = create_download_link(revised_content, f"{dart.replace(' ', '_')}_revised.txt")
-                st.markdown(revised_download_link, unsafe_allow_html=True)
+
+        revision_history = store.revisions(project, dart, variant_hash)
+        if revision_history:
+            with container.expander(f"Revision history for '{dart}' ({len(revision_history)})"):
+                for number, revision in enumerate(revision_history, start=1):
+                    st.write(f"**Revision {number}:** {revision['instructions']}")
+                    show_content(st, revision["content"])
+        export_records.extend(variant_records(dart, selected_content, generated_content, revision_history))
+
+    # Bulk export of every variant and revision; the archive is only built when the button is clicked
+    if export_records:
+        export_label = selected_content if len(content_pieces) == 1 else "campaign"
+        st.subheader("Export All Variants")
+        export_formats = st.multiselect(
+            "Export formats", EXPORT_FORMATS, default=EXPORT_FORMATS,
+            help="TXT: one file per variant and revision. DOCX: one document per Dart. CSV and JSONL: one file for all.",
+        )
+        st.download_button(
+            "Download all variants (ZIP)",
+            lambda: export_zip_bytes(export_records, export_formats),
+            file_name=f"{export_name(project)}_{export_name(export_label)}_darts.zip",
+            mime=ZIP_MIME,
+            on_click="ignore",
+            disabled=not export_formats,
+        )
+
+# Cache statistics and recomputed nodes are rendered last so they include this run's work
+recomputed_nodes = [key if isinstance(key, str) else " ".join(key) for key in graph.recomputed]
+st.sidebar.caption(f"Recomputed this run: {', '.join(recomputed_nodes) or 'nothing'}")
+cache_stats = llm.cache.stats()
+st.sidebar.caption(
+    f"Cache hits: {cache_stats['hits']} · misses: {cache_stats['misses']} · "
+    f"entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KB)"
+)
+gateway_stats = llm.gateway.stats()
+st.sidebar.caption(
+    f"AI requests in flight: {gateway_stats['active']}/{gateway_stats['limit']} "
+    f"(max {gateway_stats['max_limit']}) · queued: {gateway_stats['queued']} · "
+    f"shared with other requests: {gateway_stats['coalesced']} · retries: {gateway_stats['retries']} · "
+    f"rate limited: {gateway_stats['throttled']}"
+)
+
+# Debug panel: where time, tokens and money go, per pipeline stage, for this server process
+with st.sidebar.expander("Debug: LLM metrics"):
+    metrics = llm.metrics
+    stage_rows = metrics.summary()
+    if stage_rows:
+        st.dataframe(stage_rows, hide_index=True)
+        st.caption(
+            f"Total: {sum(row['calls'] for row in stage_rows)} calls · "
+            f"{sum(row['prompt_tokens'] + row['completion_tokens'] for row in stage_rows)} tokens · "
+            f"${sum(row['cost'] for row in stage_rows):.4f}"
+        )
+        st.dataframe([record._asdict() for record in metrics.records()[-50:]], hide_index=True)
+    else:
+        st.caption("No LLM calls yet.")
+    st.download_button("Export JSON", metrics.to_json(), file_name="darts_metrics.json", mime="application/json")
+    st.download_button("Export Prometheus", metrics.to_prometheus(), file_name="darts_metrics.prom", mime="text/plain")
+
+# Background jobs of this project
+project_jobs = jobs.list(project=project, statuses=PENDING_STATES)
+st.sidebar.caption(
+    f"Background jobs for '{project}': {sum(job['status'] == QUEUED for job in project_jobs)} queued · "
+    f"{len(project_jobs) - sum(job['status'] == QUEUED for job in project_jobs)} running"
+)
+
+# Poll until this page's background jobs finish; any interaction interrupts the wait
+if pending_jobs:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
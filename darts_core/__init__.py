@@ -0,0 +1 @@
+"""Reusable building blocks for Darts at Scale that do not depend on Streamlit."""
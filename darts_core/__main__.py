@@ -0,0 +1,5 @@
+import sys
+
+from darts_core.cli import main
+
+sys.exit(main())
@@ -0,0 +1,200 @@
+"""Batch-mode generation of Dart x content variants through the provider's batch API.
+
+Large offline runs are written as one JSONL file of chat-completion requests, uploaded with
+``files.create(purpose="batch")`` and submitted with ``batches.create``. The batch is polled
+until it finishes and every output line is mapped back to its (dart, content) pair through
+its custom_id. Batches trade latency (up to the 24h completion window) for lower prices.
+"""
+import io
+import json
+import time
+
+from darts_core.concurrency import TaskResult
+from darts_core.llm import DEFAULT_MODEL
+from darts_core.llm_cache import cache_key
+from darts_core.pipeline import build_generation_prompt, clean_generated_text, schedule_variants
+from darts_core.store import input_hash
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_INTERVAL = 30.0
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchError(Exception):
+    """Raised when a batch as a whole fails, expires or is cancelled."""
+
+
+class BatchRequestError(Exception):
+    """Error of one request inside a batch."""
+
+
+def batch_custom_id(dart, content_name):
+    """Return the stable custom_id of the request for one (dart, content) pair."""
+    return input_hash(dart, content_name)[:32]
+
+
+def build_batch_requests(content_pieces, brand_summary, darts, model=DEFAULT_MODEL, skip=(), clusters=None):
+    """Return (requests, targets): batch request lines and the (dart, content) pairs each custom_id serves.
+
+    content_pieces maps a content name to its text and darts maps a Dart name to its details;
+    pairs listed in skip are left out. Requests are scheduled like personalize_content, so
+    identical content pieces and the Darts of one cluster share a request.
+    """
+    requests = []
+    targets = {}
+    for dart, unit_targets in schedule_variants(content_pieces, darts, skip, clusters):
+        content_name = unit_targets[0][1]
+        custom_id = batch_custom_id(dart, content_name)
+        prompt = build_generation_prompt(content_pieces[content_name], brand_summary, darts[dart]["Characteristics"])
+        requests.append({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_ENDPOINT,
+            "body": {"model": model, "messages": [{"role": "user", "content": prompt}]},
+        })
+        targets[custom_id] = unit_targets
+    return requests, targets
+
+
+def requests_to_jsonl(requests):
+    """Serialise batch request lines to JSONL bytes."""
+    return "".join(json.dumps(request, ensure_ascii=False) + "\n" for request in requests).encode("utf-8")
+
+
+def parse_batch_output(text):
+    """Return {custom_id: completion text or BatchRequestError} for a batch output or error file."""
+    outcomes = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        error = record.get("error") or body.get("error")
+        if error or response.get("status_code", 200) >= 400:
+            message = error.get("message") if isinstance(error, dict) else error
+            outcomes[record["custom_id"]] = BatchRequestError(message or f"HTTP {response.get('status_code')}")
+            continue
+        outcomes[record["custom_id"]] = body["choices"][0]["message"]["content"] or ""
+    return outcomes
+
+
+class BatchRunner:
+    """Submit, track and collect chat-completion batches with an OpenAI-compatible client."""
+
+    def __init__(self, client, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    def submit(self, requests, metadata=None):
+        """Upload the request lines and start a batch; return the batch object."""
+        upload = self.client.files.create(
+            file=("darts_batch.jsonl", io.BytesIO(requests_to_jsonl(requests)), "application/jsonl"), purpose="batch"
+        )
+        return self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+            metadata=metadata,
+        )
+
+    def wait(self, batch_id, on_status=None):
+        """Poll the batch until it reaches a terminal status and return it.
+
+        on_status receives the batch object after every poll. Raises BatchError if the batch
+        failed, expired or was cancelled without producing any output.
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if on_status is not None:
+                on_status(batch)
+            if batch.status in TERMINAL_STATUSES:
+                break
+            time.sleep(self.poll_interval)
+        if batch.status != "completed" and not batch.output_file_id:
+            raise BatchError(f"Batch {batch_id} {batch.status}: {getattr(batch, 'errors', None)}")
+        return batch
+
+    def outcomes(self, batch):
+        """Return {custom_id: completion text or BatchRequestError} for a finished batch."""
+        outcomes = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                outcomes.update(parse_batch_output(self.client.files.content(file_id).text))
+        return outcomes
+
+
+def personalize_content_batch(runner, content_pieces, brand_summary, darts, model=DEFAULT_MODEL, skip=(),
+                              clusters=None, cache=None, batch_id=None, submitted=None, on_submit=None,
+                              on_status=None, on_result=None):
+    """Generate every Dart x content variant in one provider batch.
+
+    Variants already in the completion cache are served from it and the rest are submitted
+    together; batch results are written back to the cache. on_submit receives (batch id,
+    custom_id -> targets mapping) right after submission so callers can record both. Pass
+    them back as batch_id and submitted to resume tracking an earlier, unfinished submission
+    instead of submitting again; its results are then mapped through the recorded targets,
+    which stay right even if the Darts, grouping or content changed since. Raises BatchError
+    if the batch failed, expired or was cancelled. Returns TaskResults like
+    personalize_content, with (dart, content name) items.
+    """
+    results = []
+    if batch_id is not None and submitted is not None:
+        skip = set(skip)
+        targets = {
+            custom_id: tuple(tuple(target) for target in custom_targets if tuple(target) not in skip)
+            for custom_id, custom_targets in submitted.items()
+        }
+        outcomes = runner.outcomes(runner.wait(batch_id, on_status=on_status))
+        for custom_id, custom_targets in targets.items():
+            outcome = outcomes.get(custom_id, BatchRequestError("No result in the batch output"))
+            for target in custom_targets:
+                if isinstance(outcome, Exception):
+                    result = TaskResult(len(results), target, None, outcome)
+                else:
+                    result = TaskResult(len(results), target, clean_generated_text(outcome), None)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
+
+    requests, targets = build_batch_requests(
+        content_pieces, brand_summary, darts, model=model, skip=skip, clusters=clusters
+    )
+
+    def record(custom_id, value=None, error=None):
+        for target in targets[custom_id]:
+            result = TaskResult(len(results), target, value, error)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    keys = {}
+    pending = []
+    for request in requests:
+        custom_id = request["custom_id"]
+        if cache is not None:
+            keys[custom_id] = cache_key(model, request["body"]["messages"])
+            cached = cache.get(keys[custom_id])
+            if cached is not None:
+                record(custom_id, clean_generated_text(cached))
+                continue
+        pending.append(request)
+
+    if pending:
+        if batch_id is None:
+            batch_id = runner.submit(pending, metadata={"source": "darts"}).id
+            if on_submit is not None:
+                on_submit(batch_id, {request["custom_id"]: targets[request["custom_id"]] for request in pending})
+        outcomes = runner.outcomes(runner.wait(batch_id, on_status=on_status))
+        for request in pending:
+            custom_id = request["custom_id"]
+            outcome = outcomes.get(custom_id, BatchRequestError("No result in the batch output"))
+            if isinstance(outcome, Exception):
+                record(custom_id, error=outcome)
+                continue
+            if cache is not None:
+                cache.set(keys[custom_id], outcome, model=model)
+            record(custom_id, clean_generated_text(outcome))
+    return results
@@ -0,0 +1,257 @@
+"""Command-line runner for the full Darts personalization pipeline.
+
+Example::
+
+    python -m darts_core --brand-guide brand.pdf --darts darts.pdf --content-dir emails/ --output results/
+
+Every Dart x content variant is appended to a JSONL file as soon as it is generated (and, when
+--output is a directory, also written to ``<output>/<content>/<dart>.txt``). Re-running the same
+command skips the variants already recorded, and the completion cache makes the brand and Dart
+extraction steps free on a resumed run.
+
+With --batch the variants are generated through the provider's batch API instead of one
+interactive request each. The submitted batch is recorded next to the JSONL file, so a rerun
+while it is still in progress resumes tracking it rather than submitting it again. If the batch
+fails, expires or is cancelled, its record is removed and the remaining variants are generated
+interactively. With --cluster-darts, near-duplicate Darts share one generated variant.
+"""
+import argparse
+import json
+import os
+import sys
+
+from darts_core.batch import DEFAULT_POLL_INTERVAL, BatchError, BatchRunner, personalize_content_batch
+from darts_core.clustering import DEFAULT_SIMILARITY_THRESHOLD, cluster_darts
+from darts_core.concurrency import DEFAULT_MAX_WORKERS
+from darts_core.documents import MIME_TYPES, DocumentTextCache
+from darts_core.export import export_name
+from darts_core.gateway import LLMGateway
+from darts_core.llm import DEFAULT_MODEL, LLMClient
+from darts_core.llm_cache import CompletionCache
+from darts_core.metrics import MetricsRecorder
+from darts_core.pipeline import extract_all_darts, personalize_content, summarize_brand
+from darts_core.preprocess import clean_document, cleaning_summary, join_pages
+from darts_core.retrieval import DEFAULT_CONTEXT_TOKENS
+
+VARIANTS_FILE = "variants.jsonl"
+BATCH_MANIFEST_SUFFIX = ".batch.json"
+
+
+def load_content_dir(directory, documents):
+    """Return the text of every supported document in directory, keyed by file name."""
+    contents = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and os.path.splitext(name)[1].lower() in MIME_TYPES:
+            contents[name] = join_pages(documents.get_file_text(path))
+    return contents
+
+
+def read_document(documents, path, dedupe=True):
+    """Return a document's text with boilerplate stripped, reporting the tokens saved on stderr."""
+    cleaned = clean_document(documents.get_file_text(path), dedupe=dedupe)
+    print(f"{os.path.basename(path)}: {cleaning_summary(cleaned)}", file=sys.stderr)
+    return cleaned.text
+
+
+def read_completed(path):
+    """Return the (dart, content) pairs already recorded in a variants JSONL file."""
+    completed = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash; the variant is generated again
+                completed.add((record["dart"], record["content"]))
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def run_batch(llm, args, contents, brand_summary, darts, clusters, completed, variants_path, on_result):
+    """Generate the missing variants in one provider batch, resuming a recorded unfinished batch.
+
+    The manifest records the batch id and the (dart, content) pairs of every custom_id, so a
+    resumed batch maps its results correctly even if the Darts or their grouping changed. When
+    the batch fails, expires or is cancelled, the manifest is removed and the variants it did
+    not deliver are generated interactively instead.
+    """
+    manifest_path = variants_path + BATCH_MANIFEST_SUFFIX
+    batch_id = submitted = None
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        batch_id, submitted = manifest["batch_id"], manifest.get("targets")
+        print(f"Resuming batch {batch_id}", file=sys.stderr)
+    except FileNotFoundError:
+        pass
+
+    def record_batch(submitted_id, targets):
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"batch_id": submitted_id, "requests": len(targets), "targets": targets}, f)
+        print(f"Submitted batch {submitted_id} with {len(targets)} requests", file=sys.stderr)
+
+    def show_status(batch):
+        counts = batch.request_counts
+        progress = f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts else ""
+        print(f"Batch {batch.id}: {batch.status}{progress}", file=sys.stderr)
+
+    reported = set()
+
+    def report(result):
+        reported.add(result.item)
+        on_result(result)
+
+    try:
+        personalize_content_batch(
+            BatchRunner(llm.gateway.client, poll_interval=args.batch_poll_interval),
+            contents,
+            brand_summary,
+            darts,
+            model=llm.model,
+            skip=completed,
+            clusters=clusters,
+            cache=llm.cache,
+            batch_id=batch_id,
+            submitted=submitted,
+            on_submit=record_batch,
+            on_status=show_status,
+            on_result=report,
+        )
+    except BatchError as error:
+        print(f"{error}; generating the remaining variants interactively", file=sys.stderr)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        personalize_content(
+            llm, contents, brand_summary, darts, max_workers=args.workers, skip=completed | reported,
+            clusters=clusters, on_result=on_result,
+        )
+        return
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="darts_core", description="Personalize content for every Dart in a darts document.")
+    parser.add_argument("--brand-guide", required=True, help="Brand and style guide (PDF, DOCX or TXT).")
+    parser.add_argument("--darts", required=True, help="Darts document (PDF, DOCX or TXT).")
+    parser.add_argument("--content-dir", required=True, help="Directory of content pieces to personalize.")
+    parser.add_argument("--output", required=True, help="Output directory, or a path ending in .jsonl for JSONL only.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Maximum concurrent AI requests.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Chat completion model.")
+    parser.add_argument("--per-dart", action="store_true", help="Extract Dart details with one request per Dart.")
+    parser.add_argument(
+        "--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS,
+        help="Token budget for the darts document sections sent with each per-Dart request.",
+    )
+    parser.add_argument(
+        "--cluster-darts", action="store_true",
+        help="Generate one variant per group of near-duplicate Darts and reuse it for the whole group.",
+    )
+    parser.add_argument(
+        "--cluster-threshold", type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+        help="Similarity (0-1) above which Darts are grouped with --cluster-darts.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the completion cache.")
+    parser.add_argument("--batch", action="store_true", help="Generate variants through the batch API.")
+    parser.add_argument(
+        "--batch-poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between batch status checks.",
+    )
+    parser.add_argument("--base-url", help="OpenAI-compatible API base URL, e.g. a local mock server.")
+    parser.add_argument(
+        "--metrics", help="Write LLM call metrics to this path: Prometheus text if it ends in .prom, otherwise JSON.",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    jsonl_only = args.output.endswith(".jsonl")
+    if jsonl_only:
+        variants_path = args.output
+        os.makedirs(os.path.dirname(os.path.abspath(variants_path)), exist_ok=True)
+    else:
+        variants_path = os.path.join(args.output, VARIANTS_FILE)
+        os.makedirs(args.output, exist_ok=True)
+
+    llm = LLMClient(
+        LLMGateway(max_concurrency=args.workers, base_url=args.base_url),
+        cache=None if args.no_cache else CompletionCache(),
+        model=args.model,
+        metrics=MetricsRecorder(),
+    )
+    documents = DocumentTextCache()
+
+    print("Summarizing brand guide...", file=sys.stderr)
+    brand_summary = summarize_brand(llm, read_document(documents, args.brand_guide))
+    print("Extracting Darts...", file=sys.stderr)
+    darts = extract_all_darts(
+        llm,
+        read_document(documents, args.darts, dedupe=False),
+        max_workers=args.workers,
+        structured=not args.per_dart,
+        context_tokens=args.context_tokens,
+    )
+    contents = load_content_dir(args.content_dir, documents)
+    clusters = None
+    if args.cluster_darts:
+        clusters = cluster_darts(darts, threshold=args.cluster_threshold)
+        for cluster in clusters:
+            if len(cluster) > 1:
+                print(f"Generating '{cluster[0]}' once for: {', '.join(cluster)}", file=sys.stderr)
+
+    completed = read_completed(variants_path)
+    total = len(darts) * len(contents)
+    print(
+        f"{len(darts)} Darts x {len(contents)} content pieces = {total} variants "
+        f"({len(completed & {(d, c) for d in darts for c in contents})} already done)",
+        file=sys.stderr,
+    )
+
+    failures = []
+    with open(variants_path, "a", encoding="utf-8") as out:
+        def write_variant(result):
+            dart, content_name = result.item
+            if result.error is not None:
+                failures.append(result)
+                print(f"FAILED {dart} / {content_name}: {result.error}", file=sys.stderr)
+                return
+            if not jsonl_only:
+                variant_dir = os.path.join(args.output, export_name(os.path.splitext(content_name)[0]))
+                os.makedirs(variant_dir, exist_ok=True)
+                with open(os.path.join(variant_dir, f"{export_name(dart)}.txt"), "w", encoding="utf-8") as f:
+                    f.write(result.value)
+            record = {
+                "dart": dart,
+                "content": content_name,
+                "characteristics": darts[dart]["Characteristics"],
+                "variant": result.value,
+            }
+            # The JSONL record is written last and flushed so it only marks fully written variants
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            print(f"done {dart} / {content_name}", file=sys.stderr)
+
+        if args.batch:
+            run_batch(llm, args, contents, brand_summary, darts, clusters, completed, variants_path, write_variant)
+        else:
+            personalize_content(
+                llm, contents, brand_summary, darts, max_workers=args.workers, skip=completed, clusters=clusters,
+                on_result=write_variant,
+            )
+
+    print(f"Wrote variants to {variants_path}; {len(failures)} failed.", file=sys.stderr)
+    for row in llm.metrics.summary():
+        print(
+            f"{row['stage']}: {row['calls']} calls ({row['cache_hits']} cached), "
+            f"{row['prompt_tokens'] + row['completion_tokens']} tokens, ${row['cost']:.4f}, {row['wall_time']:.1f}s",
+            file=sys.stderr,
+        )
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(llm.metrics.to_prometheus() if args.metrics.endswith(".prom") else llm.metrics.to_json())
+    return 1 if failures else 0
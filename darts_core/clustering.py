@@ -0,0 +1,133 @@
+"""Group near-duplicate Darts so each group gets one generated variant.
+
+Dart extraction often returns overlapping personas ("Achiever" and "The Achievers", or names
+that differ only in numbering). Darts are compared by TF-IDF cosine similarity over their
+normalised names and their characteristics and drivers. Each group's first Dart, in document
+order, is generated for the whole group. Users can split Darts out of a group or merge them
+into another one.
+"""
+import math
+import re
+from collections import Counter
+
+from darts_core.extraction import normalize_dart_name
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.6
+NAME_MATCH_BOOST = 0.3  # Added to the similarity of Darts whose names share a (non-empty) key
+NAME_WEIGHT = 3  # Name words count this many times as often as words of the details
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or", "that",
+    "the", "their", "they", "this", "to", "who", "with",
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(text):
+    """Lowercase words of text in any script, without stop words and with a plural "s" removed."""
+    words = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.isalpha() and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def name_key(dart):
+    """Return the comparison key of a Dart name: "2. The Achievers" and "Achiever" share one.
+
+    Numbers inside a name are kept, so "Tier 1" and "Tier 2" do not.
+    """
+    return " ".join(_words(normalize_dart_name(dart)))
+
+
+def dart_terms(dart, details):
+    """Return the term counts of one Dart: its name words (weighted) and the words of its details."""
+    terms = Counter()
+    for word in _words(normalize_dart_name(dart)):
+        terms[f"name:{word}"] += NAME_WEIGHT
+    for field in ("Characteristics", "Psychographic Drivers"):
+        terms.update(_words(details.get(field, "")))
+    return terms
+
+
+def tfidf_vectors(term_counts):
+    """Return L2-normalised TF-IDF vectors, as {term: weight} dicts, for a list of term counts."""
+    document_frequency = Counter()
+    for counts in term_counts:
+        document_frequency.update(counts.keys())
+    total = len(term_counts)
+    vectors = []
+    for counts in term_counts:
+        vector = {
+            term: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+            for term, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items()})
+    return vectors
+
+
+def cosine(first, second):
+    """Cosine similarity of two L2-normalised sparse vectors."""
+    if len(first) > len(second):
+        first, second = second, first
+    return sum(weight * second.get(term, 0.0) for term, weight in first.items())
+
+
+def similarity(first_name, first_vector, second_name, second_vector):
+    """Cosine similarity of two Darts, boosted by NAME_MATCH_BOOST when their name keys match."""
+    score = cosine(first_vector, second_vector)
+    key = name_key(first_name)
+    if key and key == name_key(second_name):
+        score += NAME_MATCH_BOOST
+    return min(score, 1.0)
+
+
+def cluster_darts(darts, threshold=DEFAULT_SIMILARITY_THRESHOLD, overrides=None):
+    """Group darts ({name: details}) into clusters: lists of Dart names, each led by its representative.
+
+    Darts are visited in document order. Each joins the first cluster whose representative has
+    a similarity of at least threshold; otherwise it starts a new cluster.
+    overrides maps a Dart to the Dart whose cluster it should join instead, or to itself to stand
+    alone; they are applied after the automatic grouping. Clusters and their members stay in
+    document order.
+    """
+    names = list(darts)
+    vectors = dict(zip(names, tfidf_vectors([dart_terms(name, darts[name]) for name in names])))
+    clusters = []
+    for name in names:
+        for cluster in clusters:
+            leader = cluster[0]
+            if similarity(name, vectors[name], leader, vectors[leader]) >= threshold:
+                cluster.append(name)
+                break
+        else:
+            clusters.append([name])
+    return apply_overrides(clusters, names, overrides or {})
+
+
+def apply_overrides(clusters, names, overrides):
+    """Return clusters with user splits and merges applied, everything kept in document order."""
+    cluster_of = {name: index for index, cluster in enumerate(clusters) for name in cluster}
+    position = {name: index for index, name in enumerate(names)}
+    next_cluster = len(clusters)
+    for dart, target in overrides.items():
+        if dart not in cluster_of:
+            continue
+        if target == dart or target not in cluster_of:
+            cluster_of[dart] = next_cluster
+            next_cluster += 1
+        else:
+            cluster_of[dart] = cluster_of[target]
+    grouped = {}
+    for name in names:
+        grouped.setdefault(cluster_of[name], []).append(name)
+    return sorted(grouped.values(), key=lambda cluster: position[cluster[0]])
+
+
+def representatives(clusters):
+    """Return {dart: representative} for every Dart in clusters."""
+    return {name: cluster[0] for cluster in clusters for name in cluster}
@@ -0,0 +1,66 @@
+"""Bounded thread-pool fan-out that keeps per-item failures isolated."""
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("DARTS_MAX_WORKERS", "4"))
+
+# Outcome of one item: exactly one of value and error is meaningful
+TaskResult = namedtuple("TaskResult", ["index", "item", "value", "error"])
+
+
+def map_bounded(fn, items, max_workers=DEFAULT_MAX_WORKERS, on_result=None, check_cancelled=None,
+                poll_interval=0.05):
+    """Apply fn to every item with at most max_workers in flight and return TaskResults in input order.
+
+    on_result is invoked from the calling thread as each item completes, so callers can
+    update Streamlit elements without touching them from worker threads. An exception raised
+    for one item is captured in its TaskResult instead of cancelling the others.
+
+    check_cancelled is called from the calling thread before each item starts and every
+    poll_interval while items run. If it, or on_result, raises (e.g. JobCancelled), the items
+    not yet started are cancelled, those already running finish in the background, and the
+    exception propagates without waiting for them.
+    """
+    items = list(items)
+    results = [None] * len(items)
+
+    def record(index, value=None, error=None):
+        result = TaskResult(index, items[index], value, error)
+        results[index] = result
+        if on_result is not None:
+            on_result(result)
+
+    if max_workers <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            if check_cancelled is not None:
+                check_cancelled()
+            try:
+                value = fn(item)
+            except Exception as exc:
+                record(index, error=exc)
+            else:
+                record(index, value=value)
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        pending = {pool.submit(fn, item): index for index, item in enumerate(items)}
+        while pending:
+            if check_cancelled is not None:
+                check_cancelled()
+            done, _ = wait(pending, timeout=poll_interval if check_cancelled else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as exc:
+                    record(index, error=exc)
+                else:
+                    record(index, value=value)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
+
@@ -0,0 +1,325 @@
+"""Extract text from uploaded documents, parsing each distinct upload only once.
+
+PyMuPDF and python-docx are imported on first use, so importing this module stays cheap.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_MIME = "text/plain"
+MIME_TYPES = {".pdf": PDF_MIME, ".docx": DOCX_MIME, ".txt": TEXT_MIME}
+PAGE_BREAK = "\f"  # Separates the pages of parsed PDF text
+TEXT_FORMAT_VERSION = 2  # Part of the text cache key; bump when the shape of parsed text changes
+
+DEFAULT_TEXT_CACHE_DIR = os.environ.get(
+    "DARTS_TEXT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "darts", "documents"),
+)
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024  # Parsed text kept in memory before spilling to disk only
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024  # 512 MB of parsed text on disk
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # 30 days since a document was last read
+DEFAULT_PDF_WORKERS = int(os.environ.get("DARTS_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PARALLEL_MIN_PAGES = 64  # Below this, starting worker processes costs more than it saves
+PAGES_PER_TASK = 16
+
+
+def text_cache_key(data, mime_type):
+    """Return the key of a document's parsed text: a digest of its bytes, MIME type and TEXT_FORMAT_VERSION.
+
+    The same bytes uploaded as another type parse differently, so the type is part of the key.
+    """
+    digest = hashlib.sha256(f"v{TEXT_FORMAT_VERSION}\n{mime_type}\n".encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class DocumentParseError(Exception):
+    """Raised when an uploaded document cannot be parsed."""
+
+
+def mime_type_for_path(path):
+    """Return the upload MIME type for a file on disk, treating unknown extensions as plain text."""
+    return MIME_TYPES.get(os.path.splitext(path)[1].lower(), TEXT_MIME)
+
+
+def parse_document(data, mime_type):
+    """Parse raw document bytes into plain text based on the upload's MIME type.
+
+    Raises DocumentParseError if the document cannot be read as that type.
+    """
+    try:
+        if mime_type == PDF_MIME:
+            return extract_text_from_pdf(data)
+        elif mime_type == DOCX_MIME:
+            return extract_text_from_word(data)
+        else:
+            return data.decode("utf-8")
+    except Exception as exc:
+        raise DocumentParseError(f"Could not read the {mime_type} document: {exc}") from exc
+
+
+_pdf_pool = None
+_pdf_pool_workers = 0
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers):
+    """Return the shared PDF worker pool, (re)creating it when the requested size changes or it broke."""
+    global _pdf_pool, _pdf_pool_workers
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool_workers != workers:
+            if _pdf_pool is not None:
+                _pdf_pool.shutdown(wait=False)
+            # Spawned workers do not inherit the Streamlit server's threads or locks
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pdf_pool_workers = workers
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool):
+    """Drop a broken worker pool so the next large PDF starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pdf_pages(data, start, stop):
+    """Worker task: return the text of pages [start, stop) of a PDF."""
+    import fitz  # PyMuPDF for PDF text extraction
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [doc[number].get_text() for number in range(start, stop)]
+
+
+def iter_pdf_pages(data, workers=DEFAULT_PDF_WORKERS):
+    """Yield the text of each PDF page in order.
+
+    Large documents are split into page ranges that are extracted in a process pool; pages are
+    still yielded in order as soon as their range is done.
+    """
+    import fitz  # PyMuPDF for PDF text extraction
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            for page in doc:
+                yield page.get_text()
+            return
+
+    pool = _get_pdf_pool(workers)
+    try:
+        futures = [
+            pool.submit(_extract_pdf_pages, data, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pdf_pool(pool)  # A crashed worker breaks the whole pool
+        raise
+
+
+def extract_text_from_pdf(data, workers=DEFAULT_PDF_WORKERS):
+    """Extract text from PDF bytes using PyMuPDF, with pages separated by PAGE_BREAK."""
+    return PAGE_BREAK.join(iter_pdf_pages(data, workers))
+
+
+def _table_rows(table):
+    """Yield one line per table row with cell texts separated by " | ", skipping repeated merged cells."""
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = " ".join(cell.text.split())
+            if text and (not cells or cells[-1] != text):
+                cells.append(text)
+        if cells:
+            yield " | ".join(cells)
+
+
+def _iter_block_texts(container):
+    """Yield paragraph texts and table rows of a document body, header or footer in reading order."""
+    from docx.table import Table
+
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            yield from _table_rows(block)
+        else:
+            yield block.text
+
+
+def iter_docx_blocks(data):
+    """Yield the text blocks of a Word document: headers, body paragraphs and tables, then footers."""
+    from docx import Document  # python-docx for Word files
+
+    doc = Document(io.BytesIO(data))
+    headers, footers, seen_parts = [], [], set()
+    for section in doc.sections:
+        for found, header_footer in ((headers, section.header), (footers, section.footer)):
+            # Later sections usually reuse the previous header; only read each part once
+            if not header_footer.is_linked_to_previous and header_footer.part not in seen_parts:
+                seen_parts.add(header_footer.part)
+                found.append(header_footer)
+    for header in headers:
+        yield from _iter_block_texts(header)
+    yield from _iter_block_texts(doc)
+    for footer in footers:
+        yield from _iter_block_texts(footer)
+
+
+def extract_text_from_word(data):
+    """Extract text from Word document bytes using python-docx, including tables, headers and footers."""
+    return "\n".join(iter_docx_blocks(data))
+
+
+class DocumentTextCache:
+    """Bounded in-memory LRU of parsed document text that spills to a sharded directory on disk.
+
+    The disk tier is bounded too: files unread for max_age seconds expire, and the least recently
+    read ones are pruned whenever a write takes it over max_disk_bytes. Failed parses are never cached.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_TEXT_CACHE_DIR,
+        max_memory_bytes=DEFAULT_MEMORY_BYTES,
+        max_disk_bytes=DEFAULT_DISK_BYTES,
+        max_age=DEFAULT_MAX_AGE,
+    ):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.parses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get_text(self, data, mime_type):
+        """Return the text of a document, parsing it only if these bytes and type have never been seen."""
+        key = text_cache_key(data, mime_type)
+        text = self._from_memory(key)
+        if text is not None:
+            return text
+
+        with self._key_lock(key):
+            text = self._from_memory(key)
+            if text is None:
+                text = self._from_disk(key)
+            if text is None:
+                text = parse_document(data, mime_type)
+                self.parses += 1
+                self._to_disk(key, text)
+            self._to_memory(key, text)
+        return text
+
+    def get_file_text(self, path):
+        """Return the text of a document on disk."""
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            return self.get_text(data, mime_type_for_path(path))
+        except DocumentParseError as exc:
+            raise DocumentParseError(f"{path}: {exc}") from exc
+
+    @contextmanager
+    def _key_lock(self, key):
+        """Hold the lock of one key; the entry is dropped once no thread holds or waits for it."""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def _from_memory(self, key):
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+            return text
+
+    def _to_memory(self, key, text):
+        size = len(text)
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _from_disk(self, key):
+        path = self._path(key)
+        try:
+            now = time.time()
+            if self.max_age and now - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path, (now, now))  # The modification time records the last read
+            return text
+        except OSError:
+            return None
+
+    def _to_disk(self, key, text):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError:
+            pass  # The disk tier is best effort; the in-memory copy is still served
+
+    def _prune_disk(self):
+        """Delete expired files, then the least recently read ones until under max_disk_bytes."""
+        now = time.time()
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".txt"):
+                    continue
+                stat = entry.stat()
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    self._remove(entry.path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already pruned by another process
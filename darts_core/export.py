@@ -0,0 +1,108 @@
+"""Bulk export of generated and revised Dart variants as one ZIP archive.
+
+The archive is written entry by entry into a spooled temporary file, so large exports spill
+to disk instead of being assembled in memory.
+"""
+import csv
+import io
+import json
+import re
+import tempfile
+import zipfile
+
+# Export formats
+FORMAT_TXT = "txt"
+FORMAT_DOCX = "docx"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+EXPORT_FORMATS = [FORMAT_TXT, FORMAT_DOCX, FORMAT_CSV, FORMAT_JSONL]
+
+ZIP_MIME = "application/zip"
+RECORD_FIELDS = ["dart", "content", "kind", "revision", "instructions", "text"]
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def export_name(name):
+    """Turn a Dart or content name into a safe file name."""
+    return re.sub(r"[^\w\-]+", "_", name).strip("_") or "untitled"
+
+
+def variant_records(dart, content, variant, revisions=()):
+    """Return the export records of a Dart's variant followed by its revisions, oldest first."""
+    records = [{"dart": dart, "content": content, "kind": "variant", "revision": 0, "instructions": "", "text": variant}]
+    for number, revision in enumerate(revisions, start=1):
+        records.append({
+            "dart": dart,
+            "content": content,
+            "kind": "revision",
+            "revision": number,
+            "instructions": revision["instructions"],
+            "text": revision["content"],
+        })
+    return records
+
+
+def _record_stem(record):
+    suffix = "variant" if record["kind"] == "variant" else f"revision_{record['revision']}"
+    return f"{export_name(record['dart'])}/{export_name(record['content'])}_{suffix}"
+
+
+def _write_docx(records, target):
+    import docx  # Imported on first DOCX export to keep app start-up fast
+
+    document = docx.Document()
+    document.add_heading(records[0]["dart"], level=1)
+    for record in records:
+        if record["kind"] == "variant":
+            document.add_heading(f"Content: {record['content']}", level=2)
+        else:
+            document.add_heading(f"Revision {record['revision']}: {record['instructions']}", level=3)
+        for paragraph in record["text"].split("\n\n"):
+            document.add_paragraph(paragraph)
+    document.save(target)
+
+
+def write_export_zip(records, target, formats=EXPORT_FORMATS):
+    """Write records into a ZIP archive on the binary file object target.
+
+    TXT writes one file per variant and revision, DOCX one document per Dart, and CSV and
+    JSONL one file each covering every record.
+    """
+    records = list(records)
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if FORMAT_TXT in formats:
+            for record in records:
+                archive.writestr(f"{_record_stem(record)}.txt", record["text"])
+        if FORMAT_DOCX in formats:
+            by_dart = {}
+            for record in records:
+                by_dart.setdefault(record["dart"], []).append(record)
+            for dart, dart_records in by_dart.items():
+                with archive.open(f"{export_name(dart)}/{export_name(dart)}.docx", "w") as entry:
+                    _write_docx(dart_records, entry)
+        if FORMAT_CSV in formats:
+            with archive.open("variants.csv", "w") as entry:
+                text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+                writer = csv.DictWriter(text, fieldnames=RECORD_FIELDS)
+                writer.writeheader()
+                writer.writerows(records)
+                text.flush()
+                text.detach()
+        if FORMAT_JSONL in formats:
+            with archive.open("variants.jsonl", "w") as entry:
+                for record in records:
+                    entry.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def build_export_zip(records, formats=EXPORT_FORMATS, max_memory_bytes=SPOOL_MAX_BYTES):
+    """Return a file object, rewound to the start, holding the ZIP export of records."""
+    target = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+    write_export_zip(records, target, formats)
+    target.seek(0)
+    return target
+
+
+def export_zip_bytes(records, formats=EXPORT_FORMATS):
+    """Return the ZIP export of records as bytes, the form Streamlit's download button accepts."""
+    with build_export_zip(records, formats) as archive:
+        return archive.read()
@@ -0,0 +1,143 @@
+"""Single-pass, schema-validated extraction of every Dart and its details."""
+import json
+import re
+
+from darts_core.concurrency import DEFAULT_MAX_WORKERS, map_bounded
+from darts_core.metrics import STAGE_DART_EXTRACTION
+
+# Leave room for the instructions and the JSON answer inside a 128k-token context window
+DEFAULT_MAX_CONTEXT_TOKENS = 96_000
+CHARS_PER_TOKEN = 4
+
+STRUCTURED_PROMPT = (
+    "Identify every Dart (audience persona) described in the following document. For each Dart, list its "
+    "characteristics and psychographic drivers. Respond with JSON only, using exactly this shape:\n\n"
+    '{{"darts": [{{"name": "Dart name", "characteristics": ["..."], "psychographic_drivers": ["..."]}}]}}\n\n'
+    "Use the Dart names exactly as written in the document, without numbering.{scope}\n\n"
+    "Document content:\n\n{content}"
+)
+CHUNK_SCOPE = (
+    " This is part {part} of {parts} of a longer document; only include Darts that are described in this part."
+)
+
+
+def estimate_tokens(text):
+    """Roughly estimate the number of tokens in text without loading a tokenizer."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_text(text, max_tokens):
+    """Split text into chunks of at most max_tokens, breaking on paragraph boundaries where possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_size = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)] or [""]
+        for piece in pieces:
+            if current and current_size + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_size = 0
+            current.append(piece)
+            current_size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def normalize_dart_name(name):
+    """Normalize a Dart name for comparisons: drop numbering and punctuation, lowercase."""
+    name = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", name)
+    return re.sub(r"[^\w\s]", "", name).strip().lower()
+
+
+def is_generic_dart(name, generic_darts):
+    """Return True if the Dart name contains one of the generic (color-based) Dart names as a word."""
+    words = set(normalize_dart_name(name).split())
+    return any(color.lower() in words for color in generic_darts)
+
+
+def _as_items(value, field):
+    if isinstance(value, str):
+        value = [line for line in value.splitlines()]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{field}' must be a list of strings")
+    return [item.strip().lstrip("-*• ").strip() for item in value if item.strip()]
+
+
+def parse_darts_json(text):
+    """Validate a structured extraction response and return a list of (name, characteristics, drivers)."""
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Response is not valid JSON: {exc}") from exc
+    if not isinstance(payload, dict) or not isinstance(payload.get("darts"), list):
+        raise ValueError("Response must be an object with a 'darts' list")
+
+    darts = []
+    for entry in payload["darts"]:
+        if not isinstance(entry, dict) or not isinstance(entry.get("name"), str) or not entry["name"].strip():
+            raise ValueError("Every Dart must have a non-empty 'name'")
+        darts.append((
+            entry["name"].strip(),
+            _as_items(entry.get("characteristics", []), "characteristics"),
+            _as_items(entry.get("psychographic_drivers", []), "psychographic_drivers"),
+        ))
+    return darts
+
+
+def merge_darts(partial_results):
+    """Reduce per-chunk extractions into one list, merging Darts that share a normalized name."""
+    merged = {}
+    for darts in partial_results:
+        for name, characteristics, drivers in darts:
+            key = normalize_dart_name(name)
+            if key not in merged:
+                merged[key] = (name, [], [])
+            _, all_characteristics, all_drivers = merged[key]
+            all_characteristics.extend(item for item in characteristics if item not in all_characteristics)
+            all_drivers.extend(item for item in drivers if item not in all_drivers)
+    return list(merged.values())
+
+
+def _request_darts(llm, content, scope=""):
+    prompt = STRUCTURED_PROMPT.format(scope=scope, content=content)
+    response = llm.complete(prompt, stage=STAGE_DART_EXTRACTION, response_format={"type": "json_object"})
+    return parse_darts_json(response)
+
+
+def extract_darts_structured(llm, content, generic_darts=(), max_context_tokens=DEFAULT_MAX_CONTEXT_TOKENS,
+                             max_workers=DEFAULT_MAX_WORKERS, check_cancelled=None):
+    """Extract all Darts with their characteristics and psychographic drivers in one request.
+
+    Documents larger than max_context_tokens are split into chunks that are extracted
+    concurrently and merged by Dart name; check_cancelled is passed on to map_bounded for
+    them. Returns a dict of Dart name to details in the same shape as the per-Dart
+    extraction. Raises ValueError if a response fails validation.
+    """
+    if estimate_tokens(content) <= max_context_tokens:
+        darts = _request_darts(llm, content)
+    else:
+        chunks = chunk_text(content, max_context_tokens)
+        results = map_bounded(
+            lambda indexed: _request_darts(
+                llm, indexed[1], CHUNK_SCOPE.format(part=indexed[0] + 1, parts=len(chunks))
+            ),
+            list(enumerate(chunks)),
+            max_workers=max_workers,
+            check_cancelled=check_cancelled,
+        )
+        for result in results:
+            if result.error is not None:
+                raise result.error
+        darts = merge_darts(result.value for result in results)
+
+    return {
+        name: {
+            "Characteristics": "\n".join(characteristics) or "No information available.",
+            "Psychographic Drivers": "\n".join(drivers) or "No information available.",
+        }
+        for name, characteristics, drivers in darts
+        if not is_generic_dart(name, generic_darts)
+    }
@@ -0,0 +1,324 @@
+"""Process-wide gateway for chat completions shared by every session.
+
+The gateway owns one OpenAI client, so every request reuses the same pool of keep-alive HTTP
+connections. Identical requests that are in flight at the same time are collapsed into one
+(single-flight), and a global concurrency cap is shared round-robin between sessions so one
+large fan-out cannot starve everyone else. Rate limits and transient errors are retried with
+backoff while the cap is adapted (AIMD) to the throughput the provider currently allows.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from darts_core.llm_cache import cache_key
+from darts_core.retry import AIMDController, RetryPolicy, is_throttle
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("DARTS_MAX_CONCURRENCY", "16"))
+
+
+class FairLimiter:
+    """Concurrency cap whose free slots are granted round-robin across sessions."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._waiting = OrderedDict()  # session -> deque of waiters, in round-robin order
+        self._condition = threading.Condition()
+
+    def acquire(self, session):
+        """Block until a slot is granted to this session."""
+        with self._condition:
+            if self.active < self.limit and not self._waiting:
+                self.active += 1
+                return
+            waiter = {"granted": False}
+            self._waiting.setdefault(session, deque()).append(waiter)
+            while not waiter["granted"]:
+                self._condition.wait()
+
+    def release(self):
+        """Free a slot and hand it to the next session in turn."""
+        with self._condition:
+            self.active -= 1
+            self._grant()
+
+    def resize(self, limit):
+        """Change the number of slots; requests already running are never interrupted."""
+        with self._condition:
+            self.limit = max(1, limit)
+            self._grant()
+
+    def _grant(self):
+        while self.active < self.limit and self._waiting:
+            session, waiters = next(iter(self._waiting.items()))
+            waiters.popleft()["granted"] = True
+            self.active += 1
+            if waiters:
+                self._waiting.move_to_end(session)
+            else:
+                del self._waiting[session]
+        self._condition.notify_all()
+
+    def waiting(self):
+        """Return the number of requests queued for a slot."""
+        with self._condition:
+            return sum(len(waiters) for waiters in self._waiting.values())
+
+
+class _SharedStream:
+    """Chunks of one streamed completion, replayable by every request coalesced onto it."""
+
+    def __init__(self):
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._condition = threading.Condition()
+        self.info = {}  # Token usage and retries of the API call, filled in before finish()
+        self.readers = 0  # Requests replaying the stream; guarded by the gateway lock
+        self.abandoned = False
+        self.response = None
+
+    def abandon(self):
+        """Stop the API call once no request reads the stream any more."""
+        self.abandoned = True
+        response = self.response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass  # The pump sees abandoned on its next chunk either way
+
+    def publish(self, chunk):
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            with self._condition:
+                while position >= len(self._chunks) and not self._done:
+                    self._condition.wait()
+                if position < len(self._chunks):
+                    chunk = self._chunks[position]
+                    position += 1
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            yield chunk
+
+
+class LLMGateway:
+    """Single entry point for chat completions with pooled connections, single-flight and fair limits."""
+
+    def __init__(self, client=None, api_key=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, retry_policy=None,
+                 base_url=None):
+        self._client = client
+        self._client_options = {"api_key": api_key, "base_url": base_url}
+        self._client_lock = threading.Lock()
+        self.limiter = FairLimiter(max_concurrency)
+        self.aimd = AIMDController(self.limiter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.coalesced = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._completions = {}
+        self._streams = {}
+
+    @property
+    def client(self):
+        """The OpenAI client, created (and openai imported) on first use to keep start-up fast."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import openai
+
+                    # One client for the whole process: its HTTP pool keeps connections alive between
+                    # calls. Retries are handled here so they can feed the concurrency controller.
+                    self._client = openai.OpenAI(max_retries=0, **self._client_options)
+        return self._client
+
+    def _join(self, flights, key, factory):
+        """Return (flight, is_leader), registering a new flight for key if none is in progress."""
+        with self._lock:
+            flight = flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = flights[key] = factory()
+            return flight, True
+
+    def _finish(self, flights, key, flight):
+        with self._lock:
+            if flights.get(key) is flight:
+                del flights[key]
+
+    def _attempt(self, session, request):
+        """Run request() in a concurrency slot, feeding its outcome to the AIMD controller."""
+        self.limiter.acquire(session)
+        try:
+            result = request()
+        except Exception as exc:
+            if is_throttle(exc):
+                self.aimd.on_throttle()
+            raise
+        finally:
+            self.limiter.release()
+        self.aimd.on_success()
+        return result
+
+    @staticmethod
+    def _usage_info(usage, retries):
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "retries": retries,
+        }
+
+    def _backoff(self, exc, attempt):
+        """Sleep before another attempt, or re-raise exc if it should not be retried."""
+        if not self.retry_policy.should_retry(exc, attempt):
+            raise exc
+        with self._lock:
+            self.retries += 1
+        time.sleep(self.retry_policy.delay(exc, attempt))
+
+    def complete(self, model, messages, session=None, info=None, **params):
+        """Return the completion text, sharing one API call among identical concurrent requests.
+
+        If info is a dict it receives the call's token usage and retries, or coalesced=True
+        when the call shared another request's API call.
+        """
+        key = cache_key(model, messages, **params)
+        future, leader = self._join(self._completions, key, Future)
+        if not leader:
+            if info is not None:
+                info["coalesced"] = True
+            return future.result()
+
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = self._attempt(
+                        session, lambda: self.client.chat.completions.create(model=model, messages=messages, **params)
+                    )
+                    break
+                except Exception as exc:
+                    self._backoff(exc, attempt)
+                    attempt += 1
+            text = response.choices[0].message.content or ""
+            if info is not None:
+                info.update(self._usage_info(getattr(response, "usage", None), attempt))
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(text)
+            return text
+        finally:
+            self._finish(self._completions, key, future)
+
+    def stream(self, model, messages, session=None, info=None, **params):
+        """Yield completion chunks; identical concurrent requests replay one shared API stream.
+
+        info is filled in as for complete() once the stream has been read to the end. When every
+        request reading a stream has closed it, the API call is stopped.
+        """
+        key = cache_key(model, messages, **params)
+        with self._lock:
+            shared = self._streams.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._streams[key] = _SharedStream()
+            else:
+                self.coalesced += 1
+            shared.readers += 1  # Joining and counting under one lock, so a stream is never abandoned mid-join
+        if leader:
+            # The API stream is read on its own thread so that coalesced requests keep
+            # receiving chunks even if the request that started it stops reading.
+            threading.Thread(
+                target=self._pump, args=(key, shared, model, messages, session, params), daemon=True
+            ).start()
+        try:
+            yield from shared
+        finally:
+            self._leave(key, shared)
+        if info is not None:
+            info.update(shared.info if leader else {"coalesced": True})
+
+    def _leave(self, key, shared):
+        """Drop a reader of a shared stream, abandoning the API call if it was the last one."""
+        with self._lock:
+            shared.readers -= 1
+            if shared.readers or shared.abandoned:
+                return
+            if self._streams.get(key) is shared:
+                del self._streams[key]  # Later identical requests must not join an abandoned stream
+        shared.abandon()
+
+    def _pump(self, key, shared, model, messages, session, params):
+        published = []
+        usage = []
+
+        def read_stream():
+            if shared.abandoned:
+                return
+            response = shared.response = self.client.chat.completions.create(
+                model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+            )
+            try:
+                for chunk in response:
+                    if shared.abandoned:
+                        break
+                    if getattr(chunk, "usage", None) is not None:
+                        usage.append(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        published.append(delta)
+                        shared.publish(delta)
+            finally:
+                response.close()
+
+        error = None
+        try:
+            attempt = 0
+            while True:
+                try:
+                    self._attempt(session, read_stream)
+                    break
+                except Exception as exc:
+                    if published or shared.abandoned:
+                        raise  # Chunks already reached the readers; a retry would repeat them
+                    self._backoff(exc, attempt)
+                    attempt += 1
+            shared.info = self._usage_info(usage[-1] if usage else None, attempt)
+        except BaseException as exc:
+            error = exc
+        finally:
+            # Later identical requests start a new flight rather than replaying a finished one
+            self._finish(self._streams, key, shared)
+            shared.finish(error)
+
+    def stats(self):
+        """Return in-flight, queued, coalesced, retried and throttled request counts."""
+        return {
+            "active": self.limiter.active,
+            "queued": self.limiter.waiting(),
+            "coalesced": self.coalesced,
+            "limit": self.limiter.limit,
+            "max_limit": self.aimd.max_limit,
+            "retries": self.retries,
+            "throttled": self.aimd.throttled,
+        }
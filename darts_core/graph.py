@@ -0,0 +1,50 @@
+"""In-memory dependency graph that recomputes pipeline nodes only when their inputs change."""
+from collections import namedtuple
+
+from darts_core.store import input_hash
+
+Node = namedtuple("Node", ["fingerprint", "value", "value_hash"])
+
+
+class DependencyGraph:
+    """Memoize pipeline results per node, keyed on their inputs and the values of upstream nodes.
+
+    The pipeline forms the graph brand guide -> brand summary, darts document -> darts and
+    (content, brand summary, Dart) -> variant -> revision. A node's fingerprint covers its own
+    inputs and the value hashes of the nodes it depends on, so a new brand summary invalidates
+    every variant while revising one Dart leaves every other node current.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self.recomputed = []
+
+    def begin_run(self):
+        """Start tracking the nodes recomputed during one pass over the pipeline."""
+        self.recomputed = []
+
+    def fingerprint(self, inputs=(), deps=()):
+        """Return the fingerprint of a node with these inputs and upstream node keys."""
+        upstream = [self._nodes[dep].value_hash if dep in self._nodes else None for dep in deps]
+        return input_hash(list(inputs), upstream)
+
+    def get(self, key, fingerprint):
+        """Return the node's value if it was computed for this fingerprint, otherwise None."""
+        node = self._nodes.get(key)
+        if node is None or node.fingerprint != fingerprint:
+            return None
+        return node.value
+
+    def set(self, key, fingerprint, value):
+        """Record a freshly computed value for a node."""
+        self._nodes[key] = Node(fingerprint, value, input_hash(value))
+        self.recomputed.append(key)
+
+    def resolve(self, key, compute, inputs=(), deps=()):
+        """Return the node's value, calling compute() only if its inputs or upstream values changed."""
+        fingerprint = self.fingerprint(inputs, deps)
+        value = self.get(key, fingerprint)
+        if value is None:
+            value = compute()
+            self.set(key, fingerprint, value)
+        return value
@@ -0,0 +1,326 @@
+"""Persistent background job queue backed by SQLite, with a local worker pool.
+
+Long LLM work (Dart extraction, variant generation) is submitted as a job and run by worker
+threads outside the Streamlit script, so reruns and browser refreshes neither block on it
+nor cancel it. Pages poll job status and partial output by id, or find an existing job again
+by its (kind, project, key) dedupe key.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from darts_core.pipeline import clean_generated_text, extract_all_darts, stream_content_for_dart
+from darts_core.store import DARTS, VARIANT
+
+DEFAULT_JOBS_PATH = os.environ.get(
+    "DARTS_JOBS_PATH",
+    os.path.join(os.path.expanduser("~"), ".local", "share", "darts", "jobs.sqlite3"),
+)
+DEFAULT_JOB_WORKERS = int(os.environ.get("DARTS_JOB_WORKERS", "8"))
+DEFAULT_RETENTION = 7 * 24 * 60 * 60  # Finished jobs are kept for a week
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+PENDING_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Job kinds run by register_pipeline_jobs
+JOB_EXTRACT_DARTS = "extract_darts"
+JOB_GENERATE_VARIANT = "generate_variant"
+
+PROGRESS_INTERVAL = 0.5  # Seconds between partial-output writes from a running job
+
+_COLUMNS = [
+    "id", "kind", "project", "key", "status", "priority", "payload", "result", "error", "progress",
+    "cancel_requested", "created_at", "started_at", "finished_at",
+]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when the job has been cancelled."""
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress and noticing cancellation."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+        self._last_progress = 0.0
+
+    def progress(self, text, force=False):
+        """Publish partial output, at most every PROGRESS_INTERVAL seconds unless force is set."""
+        now = time.monotonic()
+        if force or now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.queue._update(self.job_id, progress=text)
+
+    def cancelled(self):
+        """Return True if cancellation of this job has been requested."""
+        return self.queue._cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation of this job has been requested."""
+        if self.cancelled():
+            raise JobCancelled()
+
+
+class JobQueue:
+    """SQLite-backed priority queue of jobs executed by a pool of worker threads.
+
+    Handlers are registered per job kind and called as handler(payload, context); their return
+    value is stored as the job's JSON result. Higher priorities run first, then oldest first.
+    Jobs that were running when the process stopped are queued again when it restarts.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, workers=DEFAULT_JOB_WORKERS, retention=DEFAULT_RETENTION):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.workers = workers
+        self._handlers = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " kind TEXT NOT NULL,"
+            " project TEXT,"
+            " key TEXT,"
+            " status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL DEFAULT 0,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " progress TEXT,"
+            " cancel_requested INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (kind, project, key)")
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, progress = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+                (*FINISHED_STATES, time.time() - retention),
+            )
+
+    def register(self, kind, handler):
+        """Run jobs of this kind with handler(payload, context)."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Start the worker threads; calling it again is a no-op."""
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._work, name=f"darts-job-worker-{number}", daemon=True)
+                for number in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Ask the workers to exit once their current job is done and wait for them."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, kind, payload, project=None, key=None, priority=0):
+        """Queue a job and return its id.
+
+        If key is given and a job of the same kind, project and key is queued, running or
+        done, that job's id is returned instead, so a refreshed page picks up where it left off.
+        """
+        with self._lock:
+            if key is not None:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND project IS ? AND key = ? AND status IN (?, ?, ?)"
+                    " ORDER BY id DESC LIMIT 1",
+                    (kind, project, key, QUEUED, RUNNING, DONE),
+                ).fetchone()
+                if row:
+                    return row[0]
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (kind, project, key, status, priority, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, project, key, QUEUED, priority, json.dumps(payload, ensure_ascii=False), time.time()),
+            ).lastrowid
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict with its decoded result, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, project=None, statuses=None, limit=100):
+        """Return the newest jobs, optionally for one project and in the given states."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE 1 = 1"
+        params = []
+        if project is not None:
+            query += " AND project = ?"
+            params.append(project)
+        if statuses:
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._job(row) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancel a queued job at once, or ask a running job's handler to stop."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+
+    def find(self, kind, project, key):
+        """Return the newest job of a kind for this project and dedupe key, in any state, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE kind = ? AND project IS ? AND key = ?"
+                " ORDER BY id DESC LIMIT 1",
+                (kind, project, key),
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def prioritise(self, job_id):
+        """Move a queued job to the front of the queue."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET priority = (SELECT COALESCE(MAX(priority), 0) + 1 FROM jobs WHERE status = ?)"
+                " WHERE id = ? AND status = ?",
+                (QUEUED, job_id, QUEUED),
+            )
+
+    def set_priority(self, job_id, priority):
+        """Change the priority of a queued job."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET priority = ? WHERE id = ? AND status = ?", (priority, job_id, QUEUED))
+
+    def _job(self, row):
+        job = dict(zip(_COLUMNS, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _claim(self):
+        """Mark the next runnable job as running and return (id, kind, payload), or None."""
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, kind, payload FROM jobs WHERE status = ? AND kind IN ({', '.join('?' * len(kinds))})"
+                " ORDER BY priority DESC, id LIMIT 1",
+                (QUEUED, *kinds),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, time.time(), row[0]))
+        return row[0], row[1], json.loads(row[2])
+
+    def _work(self):
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+            claimed = self._claim()
+            if claimed is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(timeout=1.0)
+                continue
+            job_id, kind, payload = claimed
+            try:
+                result = self._handlers[kind](payload, JobContext(self, job_id))
+            except JobCancelled:
+                self._update(job_id, status=CANCELLED, finished_at=time.time())
+            except Exception as exc:
+                self._update(job_id, status=FAILED, error=f"{type(exc).__name__}: {exc}", finished_at=time.time())
+            else:
+                self._update(
+                    job_id, status=DONE, result=json.dumps(result, ensure_ascii=False), finished_at=time.time()
+                )
+
+
+def register_pipeline_jobs(queue, make_llm, store):
+    """Register the Dart extraction and variant generation job kinds on queue.
+
+    make_llm(payload) returns the LLMClient a job should use; results are saved to store under
+    the payload's project and input hash before the job is marked done.
+    """
+
+    def extract_darts(payload, context):
+        llm = make_llm(payload)
+        done = []
+
+        def report(result):
+            done.append(result.item)
+            context.progress(f"{len(done)} Darts extracted", force=True)
+
+        darts = extract_all_darts(
+            llm,
+            payload["text"],
+            generic_darts=payload["generic_darts"],
+            max_workers=payload["max_workers"],
+            structured=payload["structured"],
+            context_tokens=payload["context_tokens"],
+            on_result=report,
+            check_cancelled=context.check_cancelled,
+        )
+        store.save(payload["project"], DARTS, payload["input_hash"], darts, label=payload.get("label"))
+        return darts
+
+    def generate_variant(payload, context):
+        llm = make_llm(payload)
+        parts = []
+        chunks = stream_content_for_dart(
+            llm, payload["content"], payload["brand_summary"], payload["characteristics"], dart=payload["dart"]
+        )
+        try:
+            for chunk in chunks:
+                context.check_cancelled()
+                parts.append(chunk)
+                context.progress("".join(parts))
+        finally:
+            chunks.close()  # Stops the API call when the job is cancelled
+        text = clean_generated_text("".join(parts))
+        store.save(payload["project"], VARIANT, payload["input_hash"], text, label=payload["dart"])
+        return text
+
+    queue.register(JOB_EXTRACT_DARTS, extract_darts)
+    queue.register(JOB_GENERATE_VARIANT, generate_variant)
@@ -0,0 +1,89 @@
+"""Per-session client for single-prompt chat completions."""
+import time
+
+from darts_core.llm_cache import CACHE_BYPASS, CACHE_MODES, CACHE_REFRESH, CACHE_USE, cache_key
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+class LLMClient:
+    """Send single-prompt chat completions through an optional response cache and the shared LLMGateway."""
+
+    def __init__(self, gateway, cache=None, model=DEFAULT_MODEL, cache_mode=CACHE_USE, session=None, metrics=None):
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {cache_mode!r}")
+        self.gateway = gateway
+        self.cache = cache
+        self.model = model
+        self.cache_mode = cache_mode
+        self.session = session
+        self.metrics = metrics
+
+    def _lookup(self, model, messages, params):
+        """Return (cache key, cached text); the key is None when the cache is not in use."""
+        if self.cache is None or self.cache_mode == CACHE_BYPASS:
+            return None, None
+        key = cache_key(model, messages, **params)
+        if self.cache_mode == CACHE_REFRESH:
+            return key, None
+        return key, self.cache.get(key)
+
+    def _record(self, stage, dart, model, started, **fields):
+        if self.metrics is not None:
+            self.metrics.record_call(stage, model, time.perf_counter() - started, dart=dart, **fields)
+
+    def complete(self, prompt, model=None, stage=None, dart=None, **params):
+        """Return the completion text for prompt, serving repeated prompts from the cache.
+
+        stage and dart only tag the call's metrics; they are not sent to the model.
+        """
+        started = time.perf_counter()
+        model = model or self.model
+        messages = [{"role": "user", "content": prompt}]
+        key, cached = self._lookup(model, messages, params)
+        if cached is not None:
+            self._record(stage, dart, model, started, cached=True)
+            return cached
+
+        info = {}
+        try:
+            text = self.gateway.complete(model, messages, session=self.session, info=info, **params)
+        except Exception as exc:
+            self._record(stage, dart, model, started, error=exc)
+            raise
+        self._record(stage, dart, model, started, **info)
+        if key is not None:
+            self.cache.set(key, text, model=model)
+        return text
+
+    def stream(self, prompt, model=None, stage=None, dart=None, **params):
+        """Yield the completion text in chunks as tokens arrive.
+
+        A cached completion is yielded as a single chunk. Streamed and non-streamed requests
+        share cache entries, and a stream is only cached once it has been read to the end.
+        """
+        started = time.perf_counter()
+        model = model or self.model
+        messages = [{"role": "user", "content": prompt}]
+        key, cached = self._lookup(model, messages, params)
+        if cached is not None:
+            self._record(stage, dart, model, started, cached=True, ttft=time.perf_counter() - started)
+            yield cached
+            return
+
+        parts = []
+        ttft = None
+        info = {}
+        try:
+            for chunk in self.gateway.stream(model, messages, session=self.session, info=info, **params):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                parts.append(chunk)
+                yield chunk
+        except (Exception, GeneratorExit) as exc:
+            # GeneratorExit: the caller closed the stream early, which stops the API call
+            self._record(stage, dart, model, started, ttft=ttft, error=exc)
+            raise
+        self._record(stage, dart, model, started, ttft=ttft, **info)
+        if key is not None:
+            self.cache.set(key, "".join(parts), model=model)
@@ -0,0 +1,184 @@
+"""Latency, token and cost metrics for every LLM call, tagged by pipeline stage and Dart."""
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# Pipeline stages
+STAGE_BRAND_SUMMARY = "brand_summary"
+STAGE_DART_NAMES = "dart_names"
+STAGE_DART_DETAILS = "dart_details"
+STAGE_DART_EXTRACTION = "dart_extraction"
+STAGE_GENERATION = "generation"
+STAGE_REVISION = "revision"
+STAGE_REVISION_SCOPE = "revision_scope"
+STAGE_OTHER = "other"
+
+CallRecord = namedtuple(
+    "CallRecord",
+    [
+        "stage", "dart", "model", "started_at", "wall_time", "ttft", "cached", "coalesced",
+        "prompt_tokens", "completion_tokens", "retries", "cost", "error",
+    ],
+)
+
+_TOTAL_FIELDS = ["calls", "cache_hits", "coalesced", "errors", "retries", "prompt_tokens", "completion_tokens",
+                 "cost", "wall_time"]
+
+
+def call_cost(model, prompt_tokens, completion_tokens, prices=MODEL_PRICES):
+    """Return the USD cost of a call, or 0.0 for a model without a known price."""
+    prompt_price, completion_price = prices.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _quantile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class MetricsRecorder:
+    """Thread-safe record of LLM calls with cumulative per-stage totals.
+
+    Totals are kept for the life of the process, so they can be exported as Prometheus
+    counters; latency quantiles and the per-call log cover the most recent max_records calls.
+    """
+
+    def __init__(self, max_records=10_000, prices=MODEL_PRICES):
+        self.prices = prices
+        self._records = deque(maxlen=max_records)
+        self._totals = {}  # (stage, model) -> dict of _TOTAL_FIELDS
+        self._lock = threading.Lock()
+
+    def record_call(self, stage, model, wall_time, dart=None, ttft=None, cached=False, coalesced=False,
+                    prompt_tokens=0, completion_tokens=0, retries=0, error=None):
+        """Record one LLM call; cached and coalesced calls cost nothing."""
+        stage = stage or STAGE_OTHER
+        cost = 0.0 if cached or coalesced else call_cost(model, prompt_tokens, completion_tokens, self.prices)
+        record = CallRecord(
+            stage, dart, model, time.time() - wall_time, wall_time, ttft, cached, coalesced,
+            prompt_tokens, completion_tokens, retries, cost, None if error is None else repr(error),
+        )
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.setdefault((stage, model), dict.fromkeys(_TOTAL_FIELDS + ["cache_wall_time"], 0))
+            totals["calls"] += 1
+            totals["cache_hits"] += cached
+            totals["cache_wall_time"] += wall_time if cached else 0.0
+            totals["coalesced"] += coalesced
+            totals["errors"] += error is not None
+            totals["retries"] += retries
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost"] += cost
+            totals["wall_time"] += wall_time
+        return record
+
+    def records(self, stage=None):
+        """Return the recent call records, oldest first, optionally for one stage."""
+        with self._lock:
+            records = list(self._records)
+        return [record for record in records if stage is None or record.stage == stage]
+
+    def summary(self):
+        """Return one dict per stage with totals and latency quantiles of its uncached calls."""
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+            records = list(self._records)
+        stages = {}
+        for (stage, _), value in totals.items():
+            row = stages.setdefault(stage, dict.fromkeys(_TOTAL_FIELDS, 0))
+            for field in _TOTAL_FIELDS:
+                row[field] += value[field]
+        rows = []
+        for stage, row in sorted(stages.items()):
+            live = [record for record in records if record.stage == stage and not record.cached]
+            wall_times = [record.wall_time for record in live]
+            ttfts = [record.ttft for record in live if record.ttft is not None]
+            rows.append({
+                "stage": stage,
+                **row,
+                "cost": round(row["cost"], 6),
+                "wall_time": round(row["wall_time"], 3),
+                "wall_p50": _quantile(wall_times, 0.5),
+                "wall_p95": _quantile(wall_times, 0.95),
+                "ttft_p50": _quantile(ttfts, 0.5),
+            })
+        return rows
+
+    def to_json(self, include_calls=True):
+        """Return the summary, and optionally the recent call log, as a JSON document."""
+        payload = {"generated_at": time.time(), "stages": self.summary()}
+        if include_calls:
+            payload["calls"] = [record._asdict() for record in self.records()]
+        return json.dumps(payload, indent=2)
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+            records = list(self._records)
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value:g}")
+
+        keys = sorted(totals)
+
+        def labelled(field, extra=()):
+            return [((("stage", stage), ("model", model)) + extra, totals[(stage, model)][field]) for stage, model in keys]
+
+        metric("darts_llm_calls_total", "counter", "LLM calls, including cached ones.", labelled("calls"))
+        metric("darts_llm_cache_hits_total", "counter", "LLM calls served from the completion cache.",
+               labelled("cache_hits"))
+        metric("darts_llm_coalesced_total", "counter", "LLM calls that shared an identical in-flight request.",
+               labelled("coalesced"))
+        metric("darts_llm_errors_total", "counter", "LLM calls that failed.", labelled("errors"))
+        metric("darts_llm_retries_total", "counter", "Retried LLM API attempts.", labelled("retries"))
+        metric("darts_llm_tokens_total", "counter", "Tokens used by LLM calls.",
+               labelled("prompt_tokens", (("type", "prompt"),)) + labelled("completion_tokens", (("type", "completion"),)))
+        metric("darts_llm_cost_usd_total", "counter", "Estimated LLM cost in US dollars.", labelled("cost"))
+
+        # Cache hits take microseconds, so they get their own series instead of skewing the quantiles
+        series = []
+        for stage, model in keys:
+            total = totals[(stage, model)]
+            for cached in (False, True):
+                count = total["cache_hits"] if cached else total["calls"] - total["cache_hits"]
+                if count:
+                    wall_time = total["cache_wall_time"] if cached else total["wall_time"] - total["cache_wall_time"]
+                    labels = (("stage", stage), ("model", model), ("cached", str(cached).lower()))
+                    series.append((labels, stage, model, cached, count, wall_time))
+        samples = []
+        for labels, stage, model, cached, _, _ in series:
+            wall_times = [r.wall_time for r in records if r.stage == stage and r.model == model and r.cached == cached]
+            for q in (0.5, 0.95):
+                value = _quantile(wall_times, q)
+                if value is not None:
+                    samples.append((labels + (("quantile", str(q)),), value))
+        metric("darts_llm_wall_seconds", "summary", "Wall time of LLM calls, by whether the cache served them.",
+               samples)
+        for labels, _, _, _, count, wall_time in series:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+            lines.append(f"darts_llm_wall_seconds_sum{{{label_text}}} {wall_time:g}")
+            lines.append(f"darts_llm_wall_seconds_count{{{label_text}}} {count:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,260 @@
+"""Brand, Dart and content personalization steps, usable without Streamlit.
+
+Every function that talks to the model takes an ``llm`` object with the
+``complete``/``stream`` interface of :class:`darts_core.llm.LLMClient`.
+"""
+import re
+
+from darts_core.concurrency import DEFAULT_MAX_WORKERS, TaskResult, map_bounded
+from darts_core.extraction import extract_darts_structured
+from darts_core.metrics import STAGE_BRAND_SUMMARY, STAGE_DART_DETAILS, STAGE_DART_NAMES, STAGE_GENERATION
+from darts_core.retrieval import DEFAULT_CONTEXT_TOKENS, select_dart_context
+
+# List of generic Darts (color-based) to exclude
+GENERIC_DARTS = ["Red", "Green", "Blue", "Yellow", "Purple", "Orange", "Pink", "Beige", "Silver", "Maroon"]
+
+
+def format_with_spacing(text):
+    """Ensure appropriate spacing and formatting in the text."""
+    paragraphs = [line.strip() for line in text.split('\n') if line.strip()]
+    return '\n\n'.join(paragraphs)
+
+
+def remove_bullets(text):
+    """Remove bullet points, numbered lists, or special characters from the beginning of each line."""
+    cleaned_text = '\n'.join([re.sub(r'^\d+\.\s*|^[\-*•]\s*', '', line).strip() for line in text.splitlines() if line.strip()])
+    return cleaned_text.replace('*', '')
+
+
+def clean_generated_text(text):
+    """Apply the bullet and spacing cleanup to model output; safe to run on partial streamed text."""
+    return format_with_spacing(remove_bullets(text.strip()))
+
+
+def parse_brand_elements(details_text):
+    """Parse and separate brand elements from the response."""
+    brand_elements = {
+        "Brand Voice": "",
+        "Brand Positioning": "",
+        "Unique Value Propositions": ""
+    }
+
+    # Use regex to find sections and their content
+    brand_voice_match = re.search(r'Brand Voice:(.*?)(?=Brand Positioning:|Unique Value Propositions:|$)', details_text, re.S)
+    brand_positioning_match = re.search(r'Brand Positioning:(.*?)(?=Unique Value Propositions:|$)', details_text, re.S)
+    unique_value_propositions_match = re.search(r'Unique Value Propositions:(.*)', details_text, re.S)
+
+    if brand_voice_match:
+        brand_elements["Brand Voice"] = brand_voice_match.group(1).strip()
+    if brand_positioning_match:
+        brand_elements["Brand Positioning"] = brand_positioning_match.group(1).strip()
+    if unique_value_propositions_match:
+        brand_elements["Unique Value Propositions"] = unique_value_propositions_match.group(1).strip()
+
+    # Clean up any non-essential characters
+    for key in brand_elements:
+        brand_elements[key] = remove_bullets(brand_elements[key])
+
+    # Ensure no section is marked as "No information available" if it contains content
+    for key, value in brand_elements.items():
+        if not value:
+            brand_elements[key] = "No information available."
+
+    return brand_elements
+
+
+def summarize_brand(llm, content):
+    """Extract the brand voice, positioning and unique value propositions from brand guidelines text."""
+    prompt = (
+        f"Extract the brand voice, brand positioning, and unique value propositions from the following brand guidelines. "
+        f"Structure the response as follows:\n\n"
+        f"- Brand Voice:\n- Brand Positioning:\n- Unique Value Propositions:\n\n"
+        f"Brand Guidelines Content:\n\n{content}"
+    )
+    return parse_brand_elements(llm.complete(prompt, stage=STAGE_BRAND_SUMMARY).strip())
+
+
+def extract_dart_names(llm, content, generic_darts=GENERIC_DARTS):
+    """Extract only the names of specific Darts (excluding generic and color-based ones) from the document text."""
+    prompt = (
+        f"List only the names of each Dart mentioned in the following document. Do not include any descriptions, "
+        f"characteristics, or psychographic drivers, just list the Dart names as a numbered list:\n\n{content}"
+    )
+
+    response = llm.complete(prompt, stage=STAGE_DART_NAMES)
+
+    dart_names = [
+        line.strip() for line in response.splitlines()
+        if line.strip() and all(color not in line for color in generic_darts)
+    ]
+    return dart_names
+
+
+def extract_dart_details(llm, content, dart_name, context_tokens=DEFAULT_CONTEXT_TOKENS):
+    """For each Dart name, extract characteristics and psychographic drivers from the document text.
+
+    Only the document sections most relevant to the Dart, up to context_tokens, are sent.
+    """
+    content = select_dart_context(content, dart_name, context_tokens)
+    prompt = (
+        f"Provide only the characteristics and psychographic drivers for the Dart '{dart_name}' based on the following "
+        f"document content. Use this format:\n\n"
+        f"- Characteristics: (list characteristics here)\n"
+        f"- Psychographic Drivers: (list psychographic drivers here)\n\n"
+        f"Document content:\n\n{content}"
+    )
+
+    details_text = llm.complete(prompt, stage=STAGE_DART_DETAILS, dart=dart_name).strip()
+    characteristics = ""
+    psychographic_drivers = ""
+
+    if "Characteristics:" in details_text:
+        characteristics = details_text.split("Characteristics:", 1)[1].split("Psychographic Drivers:", 1)[0].strip().strip("*-")
+    if "Psychographic Drivers:" in details_text:
+        psychographic_drivers = details_text.split("Psychographic Drivers:", 1)[1].strip().strip("*-")
+
+    return {
+        "Characteristics": remove_bullets(characteristics),
+        "Psychographic Drivers": remove_bullets(psychographic_drivers)
+    }
+
+
+def extract_all_darts(llm, content, generic_darts=GENERIC_DARTS, max_workers=DEFAULT_MAX_WORKERS, structured=True,
+                      context_tokens=DEFAULT_CONTEXT_TOKENS, on_names=None, on_result=None, check_cancelled=None):
+    """Combine functions to extract all specific Darts and their details from the document text.
+
+    With structured=True every Dart is extracted in one schema-validated request, falling back
+    to one request per Dart if the response does not validate. Per-Dart requests only carry the
+    context_tokens of the document most relevant to that Dart. on_names receives the Dart names
+    before details are rendered and on_result receives each TaskResult as it completes. Darts
+    whose detail request failed are left out. check_cancelled is called between requests and
+    while they run (see map_bounded); whatever it raises stops the extraction.
+    """
+    if structured:
+        try:
+            darts = extract_darts_structured(
+                llm, content, generic_darts, max_workers=max_workers, check_cancelled=check_cancelled
+            )
+        except ValueError:
+            darts = None
+        if check_cancelled is not None:
+            check_cancelled()
+        if darts is not None:
+            if on_names:
+                on_names(list(darts))
+            if on_result:
+                for index, (dart_name, details) in enumerate(darts.items()):
+                    on_result(TaskResult(index, dart_name, details, None))
+            return darts
+
+    dart_names = extract_dart_names(llm, content, generic_darts)
+    if on_names:
+        on_names(dart_names)
+
+    results = map_bounded(
+        lambda dart_name: extract_dart_details(llm, content, dart_name, context_tokens),
+        dart_names,
+        max_workers=max_workers,
+        on_result=on_result,
+        check_cancelled=check_cancelled,
+    )
+    return {result.item: result.value for result in results if result.error is None}
+
+
+def build_generation_prompt(content, brand_summary, dart_characteristics):
+    """Build the prompt that rewrites content for a specific Dart, considering brand guidelines.
+
+    The brand block comes first and the Dart next, so prompts for the same brand and Dart share
+    a prefix that the provider can cache; only the content at the end varies.
+    """
+    brand_voice = brand_summary["Brand Voice"]
+    brand_positioning = brand_summary["Brand Positioning"]
+    unique_value_propositions = brand_summary["Unique Value Propositions"]
+
+    prompt = (
+        f"Use the brand voice, positioning, and unique value propositions described here:\n\n"
+        f"- Brand Voice: {brand_voice}\n"
+        f"- Brand Positioning: {brand_positioning}\n"
+        f"- Unique Value Propositions: {unique_value_propositions}\n\n"
+        f"Rewrite the following content to appeal to an audience with these characteristics: {dart_characteristics}. "
+        f"Ensure the content reflects the brand voice, positioning, and unique value propositions above.\n\n"
+        f"Here is the original content:\n\n{content}\n\nDo not use any emojis."
+    )
+    return prompt
+
+
+def generate_content_for_dart(llm, content, brand_summary, dart_characteristics, dart=None):
+    """Generate content tailored for a specific Dart, considering brand guidelines."""
+    response = llm.complete(
+        build_generation_prompt(content, brand_summary, dart_characteristics), stage=STAGE_GENERATION, dart=dart
+    )
+    return clean_generated_text(response)
+
+
+def stream_content_for_dart(llm, content, brand_summary, dart_characteristics, dart=None):
+    """Stream raw chunks of content tailored for a specific Dart; clean the joined text with clean_generated_text."""
+    return llm.stream(
+        build_generation_prompt(content, brand_summary, dart_characteristics), stage=STAGE_GENERATION, dart=dart
+    )
+
+
+def build_revision_prompt(content, instructions):
+    """Build the prompt that revises generated content according to user instructions."""
+    return (
+        f"Revise the following content based on these instructions:\n\n"
+        f"Instructions: {instructions}\n\n"
+        f"Content:\n{content}\n\nDo not use any emojis."
+    )
+
+
+def schedule_variants(content_pieces, darts, skip=(), clusters=None):
+    """Return the work units of the Dart x content matrix as (dart, targets) pairs.
+
+    Each unit is generated once, for dart and the text of its first target, and serves every
+    (dart, content name) pair in targets. Content pieces with identical text share a unit, and
+    when clusters of Dart names are given (see darts_core.clustering) so do the Darts of a
+    cluster, generated for its first Dart. Units run Dart by Dart, so consecutive prompts share
+    the brand and Dart prefix of build_generation_prompt. Pairs listed in skip are left out.
+    """
+    skip = set(skip)
+    names_by_text = {}
+    for content_name, content in content_pieces.items():
+        names_by_text.setdefault(content, []).append(content_name)
+    units = []
+    for cluster in clusters if clusters is not None else [[dart] for dart in darts]:
+        for names in names_by_text.values():
+            targets = tuple((dart, name) for dart in cluster for name in names if (dart, name) not in skip)
+            if targets:
+                units.append((cluster[0], targets))
+    return units
+
+
+def personalize_content(llm, content_pieces, brand_summary, darts, max_workers=DEFAULT_MAX_WORKERS, skip=(),
+                        clusters=None, on_result=None):
+    """Generate every Dart x content variant concurrently.
+
+    content_pieces maps a content name to its text and darts maps a Dart name to its details.
+    Pairs of (dart, content name) listed in skip are not generated, and identical content pieces,
+    and the Darts of one of the given clusters, are generated once (see schedule_variants).
+    Returns TaskResults whose items are (dart, content name) pairs and whose values are the
+    cleaned variants.
+    """
+    units = schedule_variants(content_pieces, darts, skip, clusters)
+    results = []
+
+    def expand(result):
+        for target in result.item[1]:
+            expanded = TaskResult(len(results), target, result.value, result.error)
+            results.append(expanded)
+            if on_result is not None:
+                on_result(expanded)
+
+    map_bounded(
+        lambda unit: generate_content_for_dart(
+            llm, content_pieces[unit[1][0][1]], brand_summary, darts[unit[0]]["Characteristics"], dart=unit[0]
+        ),
+        units,
+        max_workers=max_workers,
+        on_result=expand,
+    )
+    return results
@@ -0,0 +1,176 @@
+"""Strip boilerplate and duplicate text from parsed documents before prompts are built.
+
+PDF text carries running headers, footers, page numbers and legal blurbs on every page, and
+all of it used to be pasted into every prompt built from the document. Lines repeated at the
+edges of many pages are removed, whitespace is collapsed, and near-duplicate paragraphs are
+dropped using word shingles and MinHash with banded locality-sensitive hashing, so only
+likely matches are compared exactly.
+"""
+import re
+import zlib
+from collections import Counter, namedtuple
+
+from darts_core.documents import PAGE_BREAK
+from darts_core.extraction import estimate_tokens
+
+EDGE_LINES = 3  # Lines at the top and bottom of a page where running headers and footers live
+EDGE_SHARE = 0.25  # ...but never more than this share of a short page's lines
+MIN_REPEAT_PAGES = 3
+REPEAT_SHARE = 0.5  # A line on at least this share of pages is boilerplate
+MIN_DUPLICATE_WORDS = 8  # Shorter lines and paragraphs (headings, labels, sign-offs) are always kept
+SHINGLE_WORDS = 3
+MINHASH_SIZE = 64
+LSH_ROWS = 4  # Signature rows per band: MINHASH_SIZE / LSH_ROWS bands
+NEAR_DUPLICATE_SIMILARITY = 0.8  # Jaccard similarity of shingle sets
+
+_WORD_RE = re.compile(r"\w+")
+_EMPTY = 1 << 32
+
+CleanedText = namedtuple(
+    "CleanedText", ["text", "tokens_before", "tokens_after", "repeated_lines", "duplicate_paragraphs"]
+)
+
+
+def _normalize_line(line):
+    return " ".join(line.split())
+
+
+def _line_key(line, at_edge, body_lines):
+    """Return the key a line is counted under across pages, or None if it is never boilerplate.
+
+    Numbers are ignored at page edges so "Page 3 of 40" matches on every page.
+    """
+    if at_edge:
+        return re.sub(r"\d+", "#", line.lower()) if line else None
+    return line if body_lines and len(line.split()) >= MIN_DUPLICATE_WORDS else None
+
+
+def _line_keys(lines, body_lines):
+    filled = [index for index, line in enumerate(lines) if line]
+    depth = min(EDGE_LINES, max(1, int(len(filled) * EDGE_SHARE)))
+    edges = set(filled[:depth] + filled[-depth:])
+    return [_line_key(line, index in edges, body_lines) for index, line in enumerate(lines)]
+
+
+def strip_repeated_lines(pages, body_lines=True):
+    """Return (pages, removed lines) without running headers, footers and page numbers.
+
+    With body_lines, long lines repeated anywhere on many pages, such as legal blurbs, go too.
+    """
+    if len(pages) < MIN_REPEAT_PAGES:
+        return pages, 0
+    page_lines = [[_normalize_line(line) for line in page.splitlines()] for page in pages]
+    page_keys = [_line_keys(lines, body_lines) for lines in page_lines]
+    counts = Counter()
+    for keys in page_keys:
+        counts.update({key for key in keys if key is not None})
+    threshold = max(MIN_REPEAT_PAGES, len(pages) * REPEAT_SHARE)
+    repeated = {key for key, count in counts.items() if count >= threshold}
+
+    cleaned, removed = [], 0
+    for lines, keys in zip(page_lines, page_keys):
+        kept = [line for line, key in zip(lines, keys) if key is None or key not in repeated]
+        removed += len(lines) - len(kept)
+        cleaned.append("\n".join(kept))
+    return cleaned, removed
+
+
+def collapse_whitespace(text):
+    """Collapse runs of spaces within lines and of blank lines between paragraphs."""
+    text = "\n".join(_normalize_line(line) for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def shingles(paragraph, size=SHINGLE_WORDS):
+    """Return the hashed word shingles of a paragraph, or None if it is too short to dedupe."""
+    words = _WORD_RE.findall(paragraph.lower())
+    if len(words) < MIN_DUPLICATE_WORDS:
+        return None
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(max(1, len(words) - size + 1))}
+
+
+def minhash(hashes, size=MINHASH_SIZE):
+    """Return a one-permutation MinHash signature of a set of 32-bit hashes.
+
+    Each hash goes to one of size buckets, which keeps its smallest value; empty buckets borrow
+    the value of the next filled one so short paragraphs still get comparable signatures.
+    """
+    signature = [_EMPTY] * size
+    for value in hashes:
+        bucket, rank = value % size, value // size
+        if rank < signature[bucket]:
+            signature[bucket] = rank
+    filled = [bucket for bucket in range(size) if signature[bucket] != _EMPTY]
+    if filled and len(filled) < size:
+        borrowed = list(signature)
+        for bucket in range(size):
+            if signature[bucket] == _EMPTY:
+                source = next((other for other in filled if other > bucket), filled[0])
+                borrowed[bucket] = signature[source] + _EMPTY * ((source - bucket) % size)
+        signature = borrowed
+    return signature
+
+
+def drop_near_duplicates(paragraphs, similarity=NEAR_DUPLICATE_SIMILARITY):
+    """Return (paragraphs, removed count), keeping the first of every group of near-duplicate paragraphs."""
+    bands = {}
+    kept, kept_shingles, removed = [], [], 0
+    for paragraph in paragraphs:
+        paragraph_shingles = shingles(paragraph)
+        if paragraph_shingles is None:
+            kept.append(paragraph)
+            kept_shingles.append(None)
+            continue
+        signature = minhash(paragraph_shingles)
+        keys = [
+            (start, tuple(signature[start:start + LSH_ROWS])) for start in range(0, len(signature), LSH_ROWS)
+        ]
+        candidates = {index for key in keys for index in bands.get(key, ())}
+        if any(
+            len(paragraph_shingles & kept_shingles[index]) / len(paragraph_shingles | kept_shingles[index])
+            >= similarity
+            for index in candidates
+        ):
+            removed += 1
+            continue
+        for key in keys:
+            bands.setdefault(key, []).append(len(kept))
+        kept.append(paragraph)
+        kept_shingles.append(paragraph_shingles)
+    return kept, removed
+
+
+def join_pages(text):
+    """Return parsed document text with its page breaks turned into paragraph breaks.
+
+    For text that is sent on as is rather than through clean_document, such as content pieces.
+    """
+    return "\n\n".join(page.strip("\n") for page in text.split(PAGE_BREAK))
+
+
+def clean_document(text, dedupe=True):
+    """Return a CleanedText with boilerplate, extra whitespace and repeated text removed.
+
+    Pages are separated by PAGE_BREAK in parsed PDF text; page breaks become paragraph breaks.
+    Turn dedupe off for documents whose sections repeat wording on purpose, such as Darts
+    documents where several Darts share a description: only page headers, footers and numbers
+    are stripped then.
+    """
+    pages, repeated_lines = strip_repeated_lines(text.split(PAGE_BREAK), body_lines=dedupe)
+    cleaned = collapse_whitespace("\n\n".join(pages))
+    duplicate_paragraphs = 0
+    if dedupe:
+        paragraphs, duplicate_paragraphs = drop_near_duplicates(re.split(r"\n\s*\n", cleaned))
+        cleaned = "\n\n".join(paragraphs)
+    return CleanedText(cleaned, estimate_tokens(text), estimate_tokens(cleaned), repeated_lines, duplicate_paragraphs)
+
+
+def cleaning_summary(cleaned):
+    """Describe what cleaning removed and the tokens it saves in every prompt built from the text."""
+    saved = cleaned.tokens_before - cleaned.tokens_after
+    share = saved / cleaned.tokens_before if cleaned.tokens_before else 0.0
+    return (
+        f"Removed {cleaned.repeated_lines} repeated header, footer and boilerplate lines and "
+        f"{cleaned.duplicate_paragraphs} duplicate paragraphs: ~{saved:,} fewer tokens ({share:.0%}) in every "
+        f"prompt built from this document."
+    )
@@ -0,0 +1,131 @@
+"""Local BM25 index over document sections for picking the context relevant to one Dart."""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from darts_core.extraction import estimate_tokens, normalize_dart_name
+
+DEFAULT_CONTEXT_TOKENS = 8_000
+MAX_SECTION_CHARS = 2_000  # Longer paragraphs (e.g. PDF pages without blank lines) are split on lines
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercase word tokens used for both indexing and queries."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _is_heading(paragraph):
+    line = paragraph.strip()
+    if "\n" in line or not line:
+        return False
+    return line.startswith("#") or (len(line) <= 80 and not line.endswith((".", ",", ";", ":")))
+
+
+def _split_long(paragraph, max_chars):
+    pieces, current, size = [], [], 0
+    for line in paragraph.splitlines():
+        if current and size + len(line) > max_chars:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_sections(text, max_chars=MAX_SECTION_CHARS):
+    """Split text into (heading, body) sections: one per paragraph, tagged with the most recent heading."""
+    sections = []
+    heading = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if _is_heading(paragraph):
+            heading = paragraph.lstrip("#").strip()
+            sections.append((heading, ""))
+            continue
+        for piece in _split_long(paragraph, max_chars):
+            sections.append((heading, piece))
+    return sections
+
+
+class SectionIndex:
+    """BM25 index over the headings and paragraphs of one document."""
+
+    def __init__(self, text, max_section_chars=MAX_SECTION_CHARS):
+        self.text = text
+        self.sections = split_sections(text, max_section_chars)
+        # Headings are indexed with their paragraphs so "Achiever" matches the body under "The Achiever"
+        self._term_counts = [Counter(tokenize(f"{heading}\n{body}")) for heading, body in self.sections]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.sections)
+        self._idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def search(self, query, top_k=None):
+        """Return (score, section index) pairs with a positive BM25 score, best first."""
+        terms = set(tokenize(query))
+        scores = []
+        for position, counts in enumerate(self._term_counts):
+            score = 0.0
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[position] / (self._average_length or 1))
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scores.append((score, position))
+        scores.sort(key=lambda pair: (-pair[0], pair[1]))
+        return scores[:top_k] if top_k else scores
+
+    def select_context(self, query, token_budget=DEFAULT_CONTEXT_TOKENS):
+        """Return the best-matching sections for query that fit in token_budget, in document order.
+
+        The whole document is returned when it already fits, and its leading sections when
+        nothing matches the query.
+        """
+        if estimate_tokens(self.text) <= token_budget:
+            return self.text
+
+        ranked = [position for _, position in self.search(query)] or list(range(len(self.sections)))
+        chosen, used = [], 0
+        for position in ranked:
+            heading, body = self.sections[position]
+            cost = estimate_tokens(f"{heading}\n{body}")
+            if used + cost > token_budget:
+                continue
+            chosen.append(position)
+            used += cost
+        parts, last_heading = [], None
+        for position in sorted(chosen):
+            heading, body = self.sections[position]
+            if heading and heading != last_heading:
+                parts.append(heading)
+                last_heading = heading
+            if body:
+                parts.append(body)
+        return "\n\n".join(parts)
+
+
+@lru_cache(maxsize=16)
+def get_section_index(text):
+    """Build the section index for a document once and reuse it for every Dart."""
+    return SectionIndex(text)
+
+
+def select_dart_context(text, dart_name, token_budget=DEFAULT_CONTEXT_TOKENS):
+    """Return the parts of a darts document most relevant to one Dart, within token_budget."""
+    return get_section_index(text).select_context(normalize_dart_name(dart_name), token_budget)
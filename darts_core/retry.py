@@ -0,0 +1,98 @@
+"""Retry with Retry-After aware jittered backoff, and AIMD control of request concurrency."""
+import email.utils
+import random
+import sys
+import threading
+import time
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_throttle(exc):
+    """Return True if the error means the provider is rate limiting us."""
+    return getattr(exc, "status_code", None) == 429
+
+
+def is_retryable(exc):
+    """Return True for rate limits, timeouts, connection problems and transient server errors."""
+    # openai is only imported once a client exists, so an exception can only come from it then
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, openai.APIConnectionError):  # Includes APITimeoutError
+        return True
+    return is_throttle(exc) or getattr(exc, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(exc):
+    """Return the delay requested by the response's Retry-After headers, or None."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, deferring to Retry-After when the server sends one."""
+
+    def __init__(self, max_attempts=6, base_delay=0.5, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, exc, attempt):
+        """Return True if a failed attempt (counting from 0) should be tried again."""
+        return attempt + 1 < self.max_attempts and is_retryable(exc)
+
+    def delay(self, exc, attempt):
+        """Return how long to wait before retrying after a failed attempt."""
+        requested = retry_after_seconds(exc)
+        if requested is not None:
+            # A little jitter keeps throttled workers from retrying in lockstep
+            return min(self.max_delay, requested) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class AIMDController:
+    """Adjust a limiter's concurrency: additive increase on success, multiplicative decrease on throttling.
+
+    The limit grows by roughly one slot per window of successful requests and is halved when
+    the provider throttles us, at most once per cooldown so one burst of 429s counts once.
+    """
+
+    def __init__(self, limiter, min_limit=1, max_limit=None, decrease_factor=0.5, cooldown=2.0):
+        self.limiter = limiter
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limiter.limit
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.throttled = 0
+        self._limit = float(limiter.limit)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def on_success(self):
+        with self._lock:
+            if self._limit < self.max_limit:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                self.limiter.resize(int(self._limit))
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+            self.limiter.resize(int(self._limit))
@@ -0,0 +1,160 @@
+"""Paragraph-scoped revisions: only the paragraphs an instruction affects are sent to the model.
+
+Generated variants are cleaned into paragraphs separated by blank lines (see
+``format_with_spacing``). An instruction such as "make the closing line more urgent" is mapped
+to the paragraphs it concerns, by wording first and by a short model call on paragraph previews
+otherwise, when the previews are much shorter than the text; only those paragraphs, plus their
+neighbours as read-only context, are rewritten and spliced back in. Instructions about the whole
+text fall back to a full revision.
+"""
+import re
+
+from darts_core.metrics import STAGE_REVISION, STAGE_REVISION_SCOPE
+from darts_core.pipeline import clean_generated_text
+
+# Scoped revisions only pay off when most of the text can be left out of the request
+MIN_PARAGRAPHS = 3
+MAX_TARGET_SHARE = 0.5
+PREVIEW_CHARS = 160
+MAX_PREVIEW_SHARE = 0.5  # Above this share of the text, a locate call costs about as much as a full revision
+
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+}
+OPENING_WORDS = r"\b(?:opening|intro|introduction|greeting|salutation|subject(?: line)?|headline|hook)\b"
+CLOSING_WORDS = r"\b(?:closing|close|final|last|ending|end|conclusion|sign[- ]?off|signature|call to action|cta|p\.?s\.?)\b"
+WHOLE_WORDS = (
+    r"\b(?:overall|entire|whole|everything|throughout|all paragraphs|every paragraph|tone|voice|shorter|longer|"
+    r"shorten|lengthen|simplify|translate|rewrite|formal|informal|casual)\b"
+)
+
+PARAGRAPH_MARKER = re.compile(r"^\[(\d+)\][ \t]*", re.M)
+
+
+def split_paragraphs(text):
+    """Split cleaned generated text into its paragraphs."""
+    return [paragraph for paragraph in text.split("\n\n") if paragraph.strip()]
+
+
+def target_paragraphs(paragraphs, instructions):
+    """Return the 0-based indexes of the paragraphs the instruction names, or None if it does not say.
+
+    Recognises quoted text, "paragraph 3", ordinals ("second paragraph"), and opening or closing
+    wording. Instructions about the text as a whole return None.
+    """
+    lowered = instructions.lower()
+    count = len(paragraphs)
+    targets = set()
+
+    for quote in re.findall(r"[\"“']([^\"”']{4,})[\"”']", instructions):
+        targets.update(index for index, paragraph in enumerate(paragraphs) if quote.lower() in paragraph.lower())
+    for number in re.findall(r"\b(?:paragraph|para|line)\s+(\d+)\b", lowered):
+        if 1 <= int(number) <= count:
+            targets.add(int(number) - 1)
+    for word, number in ORDINALS.items():
+        if re.search(rf"\b{word}\s+(?:paragraph|para|line|sentence)\b", lowered) and number <= count:
+            targets.add(number - 1)
+    if targets:
+        return sorted(targets)
+
+    if re.search(WHOLE_WORDS, lowered):
+        return None
+    if re.search(CLOSING_WORDS, lowered):
+        targets.add(count - 1)
+    if re.search(OPENING_WORDS, lowered):
+        targets.add(0)
+    return sorted(targets) or None
+
+
+def locate_paragraphs(llm, paragraphs, instructions, dart=None):
+    """Ask the model which paragraphs an instruction affects, showing it only paragraph previews.
+
+    Returns sorted 0-based indexes, or None if the model answers ALL or nothing usable.
+    """
+    previews = "\n".join(
+        f"[{number}] {paragraph[:PREVIEW_CHARS]}{'...' if len(paragraph) > PREVIEW_CHARS else ''}"
+        for number, paragraph in enumerate(paragraphs, start=1)
+    )
+    prompt = (
+        f"Which paragraphs of the content below must change to follow these instructions? Answer only with the "
+        f"paragraph numbers separated by commas, or ALL if the instructions affect the whole content.\n\n"
+        f"Instructions: {instructions}\n\n"
+        f"Paragraphs (previews):\n{previews}"
+    )
+    answer = llm.complete(prompt, stage=STAGE_REVISION_SCOPE, dart=dart)
+    if "ALL" in answer.upper():
+        return None
+    targets = {int(number) - 1 for number in re.findall(r"\d+", answer) if 1 <= int(number) <= len(paragraphs)}
+    return sorted(targets) or None
+
+
+def previews_are_short(paragraphs):
+    """Return whether paragraph previews leave out enough of the text to make a locate call worthwhile."""
+    preview_chars = sum(min(len(paragraph), PREVIEW_CHARS) for paragraph in paragraphs)
+    return preview_chars <= sum(len(paragraph) for paragraph in paragraphs) * MAX_PREVIEW_SHARE
+
+
+def plan_revision(llm, content, instructions, dart=None):
+    """Return (paragraphs, targets) for a revision; targets is None when the whole text should be revised.
+
+    Makes at most one locate call, and only when its previews are much shorter than the text. A located
+    answer is always used, since the call is already paid for.
+    """
+    paragraphs = split_paragraphs(content)
+    if len(paragraphs) < MIN_PARAGRAPHS:
+        return paragraphs, None
+    targets = target_paragraphs(paragraphs, instructions)
+    if targets is not None:
+        return paragraphs, None if len(targets) > len(paragraphs) * MAX_TARGET_SHARE else targets
+    if re.search(WHOLE_WORDS, instructions.lower()) or not previews_are_short(paragraphs):
+        return paragraphs, None
+    targets = locate_paragraphs(llm, paragraphs, instructions, dart=dart)
+    if targets is not None and len(targets) == len(paragraphs):
+        return paragraphs, None
+    return paragraphs, targets
+
+
+def build_paragraph_revision_prompt(paragraphs, targets, instructions):
+    """Build the prompt that revises only the target paragraphs, with their neighbours as context."""
+    context = sorted({
+        neighbour for index in targets for neighbour in (index - 1, index + 1)
+        if 0 <= neighbour < len(paragraphs) and neighbour not in targets
+    })
+    context_text = "\n\n".join(f"[{index + 1}] {paragraphs[index]}" for index in context) or "(none)"
+    targets_text = "\n\n".join(f"[{index + 1}] {paragraphs[index]}" for index in targets)
+    return (
+        f"Revise only the numbered paragraphs under 'Paragraphs to revise' based on these instructions. "
+        f"They are excerpts of a longer piece; the surrounding paragraphs are given for context only and must "
+        f"not be returned. Return every paragraph to revise, each starting with its number in square brackets "
+        f"exactly as given, and nothing else.\n\n"
+        f"Instructions: {instructions}\n\n"
+        f"Context (do not revise):\n{context_text}\n\n"
+        f"Paragraphs to revise:\n{targets_text}\n\nDo not use any emojis."
+    )
+
+
+def parse_revised_paragraphs(response, targets):
+    """Return {index: revised text} for the target paragraphs, raising ValueError if any is missing."""
+    parts = PARAGRAPH_MARKER.split(response)
+    revised = {}
+    for number, text in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if index in targets and text.strip():
+            revised[index] = clean_generated_text(text)
+    missing = set(targets) - set(revised)
+    if missing:
+        raise ValueError(f"Revision response is missing paragraphs {sorted(index + 1 for index in missing)}")
+    return revised
+
+
+def revise_paragraphs(llm, paragraphs, targets, instructions, dart=None):
+    """Revise the target paragraphs with one request and return the full text with them spliced in.
+
+    Raises ValueError if the response does not contain every target paragraph.
+    """
+    response = llm.complete(
+        build_paragraph_revision_prompt(paragraphs, targets, instructions), stage=STAGE_REVISION, dart=dart
+    )
+    revised = parse_revised_paragraphs(response, targets)
+    return "\n\n".join(revised.get(index, paragraph) for index, paragraph in enumerate(paragraphs))
@@ -0,0 +1,133 @@
+"""SQLite-backed store of per-client projects and their generated artifacts."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "DARTS_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".local", "share", "darts", "projects.sqlite3"),
+)
+
+# Artifact kinds
+BRAND_SUMMARY = "brand_summary"
+DARTS = "darts"
+VARIANT = "variant"
+
+
+def input_hash(*parts):
+    """Return a stable hash of the inputs an artifact was computed from."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ProjectStore:
+    """Persist brand summaries, extracted Darts, variants and revisions per client project.
+
+    Every artifact is stored under the hash of the inputs it was computed from, so earlier
+    versions stay available and unchanged inputs can be served without recomputation.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            " name TEXT PRIMARY KEY,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " project TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " input_hash TEXT NOT NULL,"
+            " label TEXT,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " UNIQUE (project, kind, input_hash))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS revisions ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " project TEXT NOT NULL,"
+            " dart TEXT NOT NULL,"
+            " variant_hash TEXT NOT NULL,"
+            " instructions TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS revisions_dart ON revisions (project, dart)")
+
+    def _touch(self, project, now):
+        self._conn.execute(
+            "INSERT INTO projects (name, created_at, updated_at) VALUES (?, ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET updated_at = excluded.updated_at",
+            (project, now, now),
+        )
+
+    def list_projects(self):
+        """Return project names, most recently updated first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM projects ORDER BY updated_at DESC").fetchall()
+        return [row[0] for row in rows]
+
+    def save(self, project, kind, input_hash, payload, label=None):
+        """Store an artifact version computed from input_hash, replacing an identical version."""
+        now = time.time()
+        with self._lock:
+            self._touch(project, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (project, kind, input_hash, label, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (project, kind, input_hash, label, json.dumps(payload, ensure_ascii=False), now),
+            )
+
+    def load(self, project, kind, input_hash):
+        """Return the artifact computed from input_hash, or None if it has never been stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM artifacts WHERE project = ? AND kind = ? AND input_hash = ?",
+                (project, kind, input_hash),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest(self, project, kind, label=None):
+        """Return (input_hash, payload) of the newest artifact of a kind, optionally for one label."""
+        query = "SELECT input_hash, payload FROM artifacts WHERE project = ? AND kind = ?"
+        params = [project, kind]
+        if label is not None:
+            query += " AND label = ?"
+            params.append(label)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY created_at DESC, id DESC LIMIT 1", params).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def add_revision(self, project, dart, variant_hash, instructions, content):
+        """Append a revision of a Dart's variant to the project's history."""
+        now = time.time()
+        with self._lock:
+            self._touch(project, now)
+            self._conn.execute(
+                "INSERT INTO revisions (project, dart, variant_hash, instructions, content, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (project, dart, variant_hash, instructions, content, now),
+            )
+
+    def revisions(self, project, dart, variant_hash=None):
+        """Return the revision history of a Dart as dicts, oldest first."""
+        query = "SELECT instructions, content, created_at FROM revisions WHERE project = ? AND dart = ?"
+        params = [project, dart]
+        if variant_hash is not None:
+            query += " AND variant_hash = ?"
+            params.append(variant_hash)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [{"instructions": row[0], "content": row[1], "created_at": row[2]} for row in rows]
@@ -0,0 +1,36 @@
+"""Shared fixtures: the repository root on sys.path and a local mock OpenAI server."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_openai import MockOpenAIServer  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """A mock OpenAI server on a free port, with no latency and a fixed seed."""
+    server = MockOpenAIServer(latency=0.0, tokens_per_second=0, completion_tokens=20, batch_delay=0.1, seed=1)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mock_client(mock_server):
+    """An OpenAI client pointed at the mock server, without client-side retries."""
+    import openai
+
+    return openai.OpenAI(base_url=mock_server.url, api_key="mock", max_retries=0)
+
+
+@pytest.fixture
+def llm(mock_client):
+    """An LLMClient sending every request to the mock server, without a cache."""
+    from darts_core.gateway import LLMGateway
+    from darts_core.llm import LLMClient
+
+    return LLMClient(LLMGateway(client=mock_client, max_concurrency=4))
@@ -0,0 +1,56 @@
+import json
+
+from darts_core.batch import BatchRunner, build_batch_requests, parse_batch_output, personalize_content_batch
+
+DARTS = {
+    "Achiever": {"Characteristics": "Driven by goals."},
+    "The Achievers": {"Characteristics": "Driven by goals."},
+    "Explorer": {"Characteristics": "Curious about new things."},
+}
+CONTENT = {"welcome.txt": "Welcome aboard.", "offer.txt": "Half price this week."}
+BRAND = {"Brand Voice": "Warm.", "Brand Positioning": "Local.", "Unique Value Propositions": "Fast."}
+CLUSTERS = [["Achiever", "The Achievers"], ["Explorer"]]
+ALL_PAIRS = {(dart, name) for dart in DARTS for name in CONTENT}
+
+
+def test_build_batch_requests_maps_custom_ids_to_cluster_targets():
+    requests, targets = build_batch_requests(CONTENT, BRAND, DARTS, clusters=CLUSTERS)
+    assert len(requests) == 4
+    assert [request["custom_id"] for request in requests] == list(targets)
+    assert {target for custom_targets in targets.values() for target in custom_targets} == ALL_PAIRS
+
+
+def test_parse_batch_output_separates_errors():
+    text = "\n".join([
+        json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": "Hello"}}]}}}),
+        json.dumps({"custom_id": "b", "response": {"status_code": 500, "body": {"error": {"message": "boom"}}}}),
+    ])
+    outcomes = parse_batch_output(text)
+    assert outcomes["a"] == "Hello"
+    assert str(outcomes["b"]) == "boom"
+
+
+def test_personalize_content_batch_generates_every_pair(mock_client):
+    submitted = []
+    results = personalize_content_batch(
+        BatchRunner(mock_client, poll_interval=0.05), CONTENT, BRAND, DARTS, clusters=CLUSTERS,
+        on_submit=lambda batch_id, targets: submitted.append((batch_id, targets)),
+    )
+    assert {result.item for result in results} == ALL_PAIRS
+    assert all(result.error is None and result.value for result in results)
+    assert len(submitted) == 1 and len(submitted[0][1]) == 4
+
+
+def test_resumed_batch_uses_recorded_targets_when_grouping_changed(mock_client):
+    runner = BatchRunner(mock_client, poll_interval=0.05)
+    requests, targets = build_batch_requests(CONTENT, BRAND, DARTS, clusters=CLUSTERS)
+    batch_id = runner.submit(requests).id
+    recorded = json.loads(json.dumps(targets))  # As stored in the CLI's manifest
+
+    done = {("Explorer", "offer.txt")}
+    results = personalize_content_batch(
+        runner, CONTENT, BRAND, DARTS, skip=done, clusters=None, batch_id=batch_id, submitted=recorded
+    )
+    assert {result.item for result in results} == ALL_PAIRS - done
+    assert all(result.error is None and result.value for result in results)
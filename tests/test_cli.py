@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+
+from darts_core import cli
+from darts_core.batch import BatchRunner, build_batch_requests
+from darts_core.documents import DocumentTextCache
+
+DARTS_TEXT = "Our Darts\n\nDart: Achiever\nDriven by goals.\n\nDart: Explorer\nCurious about new things.\n"
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Input documents in tmp_path, with the document cache kept there too."""
+    (tmp_path / "brand.txt").write_text("We are warm, direct and local.", encoding="utf-8")
+    (tmp_path / "darts.txt").write_text(DARTS_TEXT, encoding="utf-8")
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    (content_dir / "welcome.txt").write_text("Welcome aboard.", encoding="utf-8")
+    (content_dir / "offer.txt").write_text("Half price this week.", encoding="utf-8")
+    monkeypatch.setattr(cli, "DocumentTextCache", lambda: DocumentTextCache(str(tmp_path / "documents")))
+    return tmp_path
+
+
+def run(workspace, mock_server, *extra):
+    return cli.main([
+        "--brand-guide", str(workspace / "brand.txt"), "--darts", str(workspace / "darts.txt"),
+        "--content-dir", str(workspace / "content"), "--output", str(workspace / "out.jsonl"),
+        "--base-url", mock_server.url, "--no-cache", "--batch", "--batch-poll-interval", "0.05", *extra,
+    ])
+
+
+def variants(workspace):
+    with open(workspace / "out.jsonl", encoding="utf-8") as f:
+        return {(record["dart"], record["content"]) for record in map(json.loads, f)}
+
+
+EXPECTED = {(dart, name) for dart in ("Achiever", "Explorer") for name in ("welcome.txt", "offer.txt")}
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "mock")
+
+
+def test_batch_run_writes_every_variant(workspace, mock_server):
+    assert run(workspace, mock_server) == 0
+    assert variants(workspace) == EXPECTED
+    assert mock_server.stats["requests"] == 2  # Brand summary and Dart extraction; variants came from the batch
+    assert not (workspace / ("out.jsonl" + cli.BATCH_MANIFEST_SUFFIX)).exists()
+
+
+def test_failed_batch_falls_back_to_interactive_generation(workspace, mock_server):
+    mock_server.batch_status = "failed"
+    assert run(workspace, mock_server) == 0
+    assert variants(workspace) == EXPECTED
+    assert mock_server.stats["requests"] == 2 + len(EXPECTED)
+    assert not (workspace / ("out.jsonl" + cli.BATCH_MANIFEST_SUFFIX)).exists()
+
+
+def test_resuming_a_dead_batch_removes_its_manifest(workspace, mock_server, mock_client):
+    mock_server.batch_status = "failed"
+    brand = {"Brand Voice": "Warm.", "Brand Positioning": "Local.", "Unique Value Propositions": "Fast."}
+    darts = {"Achiever": {"Characteristics": "Driven."}}
+    requests, targets = build_batch_requests({"welcome.txt": "Welcome aboard."}, brand, darts)
+    batch_id = BatchRunner(mock_client).submit(requests).id
+    while mock_client.batches.retrieve(batch_id).status != "failed":
+        time.sleep(0.05)
+    manifest = workspace / ("out.jsonl" + cli.BATCH_MANIFEST_SUFFIX)
+    manifest.write_text(json.dumps({"batch_id": batch_id, "requests": 1, "targets": targets}), encoding="utf-8")
+
+    mock_server.batch_status = "completed"
+    assert run(workspace, mock_server) == 0
+    assert variants(workspace) == EXPECTED
+    assert not manifest.exists()
+
+
+def test_interactive_run_resumes_without_regenerating_recorded_variants(workspace, mock_server):
+    args = [
+        "--brand-guide", str(workspace / "brand.txt"), "--darts", str(workspace / "darts.txt"),
+        "--content-dir", str(workspace / "content"), "--output", str(workspace / "results"),
+        "--base-url", mock_server.url, "--no-cache",
+    ]
+    assert cli.main(args) == 0
+    assert (workspace / "results" / "welcome" / "Achiever.txt").read_text(encoding="utf-8")
+    with open(workspace / "results" / cli.VARIANTS_FILE, encoding="utf-8") as f:
+        assert {(record["dart"], record["content"]) for record in map(json.loads, f)} == EXPECTED
+
+    generated = mock_server.stats["requests"]
+    assert cli.main(args) == 0
+    assert mock_server.stats["requests"] == generated + 2  # Only the brand summary and Dart extraction again
+    assert cli.read_completed(str(workspace / "results" / cli.VARIANTS_FILE)) == EXPECTED
+
+
+def test_read_completed_skips_a_truncated_last_line(tmp_path):
+    path = tmp_path / "variants.jsonl"
+    path.write_text('{"dart": "Achiever", "content": "a.txt"}\n{"dart": "Expl', encoding="utf-8")
+    assert cli.read_completed(str(path)) == {("Achiever", "a.txt")}
@@ -0,0 +1,56 @@
+from darts_core.clustering import apply_overrides, cluster_darts, name_key, representatives
+
+
+def details(characteristics, drivers=""):
+    return {"Characteristics": characteristics, "Psychographic Drivers": drivers}
+
+
+def test_name_key_ignores_numbering_articles_and_plurals():
+    assert name_key("2. The Achievers") == name_key("Achiever")
+
+
+def test_name_key_keeps_numbers_and_non_latin_words():
+    assert name_key("Tier 1") != name_key("Tier 2")
+    assert name_key("Предприниматель")
+    assert name_key("Предприниматель") != name_key("Пенсионер")
+
+
+def test_overlapping_personas_are_grouped():
+    darts = {
+        "The Achiever": details("Goal driven professionals who track progress.", "Recognition."),
+        "Explorer": details("Curious travellers seeking new experiences.", "Novelty."),
+        "2. Achievers": details("Ambitious people who like recognition.", "Status."),
+    }
+    assert cluster_darts(darts) == [["The Achiever", "2. Achievers"], ["Explorer"]]
+
+
+def test_unrelated_darts_with_similar_names_stay_apart():
+    darts = {
+        "Предприниматель": details("владеет бизнесом"),
+        "Пенсионер": details("на пенсии"),
+        "Tier 1": details(""),
+        "Tier 2": details(""),
+    }
+    assert cluster_darts(darts) == [["Предприниматель"], ["Пенсионер"], ["Tier 1"], ["Tier 2"]]
+
+
+def test_threshold_controls_grouping_by_details():
+    darts = {
+        "Budget Seeker": details("Families comparing prices before every purchase."),
+        "Value Hunter": details("Families comparing prices before every purchase online."),
+    }
+    # Different names weigh against the shared details
+    assert len(cluster_darts(darts, threshold=0.2)) == 1
+    assert len(cluster_darts(darts, threshold=0.6)) == 2
+
+
+def test_overrides_split_and_merge_in_document_order():
+    names = ["A", "B", "C", "D"]
+    clusters = [["A", "B"], ["C"], ["D"]]
+    assert apply_overrides(clusters, names, {"A": "A"}) == [["A"], ["B"], ["C"], ["D"]]
+    assert apply_overrides(clusters, names, {"D": "A"}) == [["A", "B", "D"], ["C"]]
+    assert apply_overrides(clusters, names, {"B": "C", "E": "A"}) == [["A"], ["B", "C"], ["D"]]
+
+
+def test_representatives_maps_every_member_to_the_first():
+    assert representatives([["A", "B"], ["C"]]) == {"A": "A", "B": "A", "C": "C"}
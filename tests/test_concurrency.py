@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from darts_core.concurrency import map_bounded
+
+
+class Stop(Exception):
+    pass
+
+
+def test_map_bounded_keeps_input_order_and_isolates_errors():
+    def fn(item):
+        if item == 3:
+            raise ValueError("bad item")
+        time.sleep(0.01 * (5 - item))
+        return item * 10
+
+    results = map_bounded(fn, range(5), max_workers=3)
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [result.value for result in results] == [0, 10, 20, None, 40]
+    assert isinstance(results[3].error, ValueError)
+
+
+def test_map_bounded_limits_concurrency():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fn(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    map_bounded(fn, range(12), max_workers=3)
+    assert peak[0] == 3
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_map_bounded_cancellation_skips_pending_items_without_waiting(max_workers):
+    started = []
+    release = threading.Event()
+    cancelled = threading.Event()
+    if max_workers == 1:
+        release.set()  # Items run in the calling thread
+
+    def fn(item):
+        started.append(item)
+        cancelled.set()
+        release.wait(timeout=5)
+
+    def check():
+        if cancelled.is_set():
+            raise Stop()
+
+    began = time.monotonic()
+    with pytest.raises(Stop):
+        map_bounded(fn, range(20), max_workers=max_workers, check_cancelled=check, poll_interval=0.01)
+    release.set()
+    if max_workers > 1:
+        assert time.monotonic() - began < 1  # Running items were not waited for
+    time.sleep(0.05)
+    assert len(started) <= max_workers
+
@@ -0,0 +1,127 @@
+import io
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from darts_core import documents
+from darts_core.documents import (
+    PAGE_BREAK, PDF_MIME, TEXT_MIME, DocumentParseError, DocumentTextCache, extract_text_from_pdf,
+    extract_text_from_word, text_cache_key,
+)
+
+
+def test_text_cache_key_depends_on_bytes_type_and_format_version(monkeypatch):
+    key = text_cache_key(b"hello", TEXT_MIME)
+    assert key == text_cache_key(b"hello", TEXT_MIME)
+    assert key != text_cache_key(b"hello!", TEXT_MIME)
+    assert key != text_cache_key(b"hello", PDF_MIME)
+    monkeypatch.setattr(documents, "TEXT_FORMAT_VERSION", documents.TEXT_FORMAT_VERSION + 1)
+    assert key != text_cache_key(b"hello", TEXT_MIME)
+
+
+def test_cache_parses_each_document_once_and_reuses_the_disk_copy(tmp_path):
+    cache = DocumentTextCache(str(tmp_path))
+    assert cache.get_text(b"Some text", TEXT_MIME) == "Some text"
+    assert cache.get_text(b"Some text", TEXT_MIME) == "Some text"
+    assert cache.parses == 1
+
+    restarted = DocumentTextCache(str(tmp_path))
+    assert restarted.get_text(b"Some text", TEXT_MIME) == "Some text"
+    assert restarted.parses == 0
+
+
+def test_same_bytes_with_another_type_are_parsed_again(tmp_path):
+    cache = DocumentTextCache(str(tmp_path))
+    assert cache.get_text(b"not a pdf", TEXT_MIME) == "not a pdf"
+    with pytest.raises(DocumentParseError):
+        cache.get_text(b"not a pdf", PDF_MIME)
+
+
+def test_broken_pdf_pool_is_replaced(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    import fitz
+
+    doc = fitz.open()
+    for _ in range(documents.PARALLEL_MIN_PAGES):
+        doc.new_page()
+    broken = BrokenPool()
+    monkeypatch.setattr(documents, "_pdf_pool", broken)
+    monkeypatch.setattr(documents, "_pdf_pool_workers", 2)
+    with pytest.raises(BrokenProcessPool):
+        extract_text_from_pdf(doc.tobytes(), workers=2)
+    assert broken.shut_down
+    assert documents._pdf_pool is None  # The next large PDF gets a fresh pool
+
+
+def test_failed_parses_are_not_cached(tmp_path, monkeypatch):
+    calls = []
+
+    def parse_once_failing(data, mime_type):
+        calls.append(data)
+        if len(calls) == 1:
+            raise DocumentParseError("worker died")
+        return data.decode("utf-8")
+
+    monkeypatch.setattr(documents, "parse_document", parse_once_failing)
+    cache = DocumentTextCache(str(tmp_path))
+    with pytest.raises(DocumentParseError):
+        cache.get_text(b"Some text", TEXT_MIME)
+    assert cache.get_text(b"Some text", TEXT_MIME) == "Some text"
+    assert len(calls) == 2
+    assert cache._key_locks == {}
+
+
+def test_disk_tier_is_bounded_by_size_and_age(tmp_path):
+    cache = DocumentTextCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=25)
+    for number in range(5):
+        cache.get_text(f"document {number}".encode(), TEXT_MIME)  # 10 bytes each
+    assert len(list(tmp_path.glob("*/*.txt"))) == 2
+    assert os.path.exists(cache._path(text_cache_key(b"document 4", TEXT_MIME)))
+
+    cache = DocumentTextCache(str(tmp_path), max_memory_bytes=0, max_age=60)
+    path = cache._path(text_cache_key(b"document 4", TEXT_MIME))
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    cache.get_text(b"document 4", TEXT_MIME)
+    assert cache.parses == 1  # Expired on disk, so parsed again
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = DocumentTextCache(str(tmp_path), max_memory_bytes=10)
+    for number in range(5):
+        cache.get_text(f"document {number}".encode(), TEXT_MIME)
+    assert len(cache._memory) == 1
+    assert cache.get_text(b"document 0", TEXT_MIME) == "document 0"
+    assert cache.parses == 5  # Served from disk after leaving memory
+
+
+def test_pdf_pages_are_separated_by_page_breaks():
+    import fitz
+
+    doc = fitz.open()
+    for text in ("First page", "Second page"):
+        doc.new_page().insert_text((72, 72), text)
+    text = extract_text_from_pdf(doc.tobytes(), workers=1)
+    assert [page.strip() for page in text.split(PAGE_BREAK)] == ["First page", "Second page"]
+
+
+def test_word_text_includes_tables_in_reading_order():
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("Before")
+    table = doc.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "Name"
+    table.rows[0].cells[1].text = "Achiever"
+    doc.add_paragraph("After")
+    data = io.BytesIO()
+    doc.save(data)
+    lines = [line for line in extract_text_from_word(data.getvalue()).splitlines() if line]
+    assert lines == ["Before", "Name | Achiever", "After"]
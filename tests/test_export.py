@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+import zipfile
+
+from darts_core.export import FORMAT_CSV, FORMAT_TXT, build_export_zip, export_name, export_zip_bytes, variant_records
+
+RECORDS = (
+    variant_records("The Achiever", "welcome.txt", "Hello.\n\nWelcome.", [{"instructions": "Warmer", "content": "Hi!"}])
+    + variant_records("Explorer", "welcome.txt", "Discover more.")
+)
+
+
+def test_variant_records_number_revisions():
+    assert [(record["kind"], record["revision"]) for record in RECORDS[:2]] == [("variant", 0), ("revision", 1)]
+    assert RECORDS[1]["instructions"] == "Warmer"
+    assert export_name("The Achiever / 2") == "The_Achiever_2"
+
+
+def test_export_zip_contains_every_format():
+    with zipfile.ZipFile(build_export_zip(RECORDS)) as archive:
+        names = set(archive.namelist())
+        assert {
+            "The_Achiever/welcome_txt_variant.txt", "The_Achiever/welcome_txt_revision_1.txt",
+            "Explorer/welcome_txt_variant.txt", "The_Achiever/The_Achiever.docx", "Explorer/Explorer.docx",
+            "variants.csv", "variants.jsonl",
+        } == names
+        assert archive.read("The_Achiever/welcome_txt_revision_1.txt").decode() == "Hi!"
+        rows = list(csv.DictReader(io.StringIO(archive.read("variants.csv").decode("utf-8"))))
+        assert [row["text"] for row in rows] == [record["text"] for record in RECORDS]
+        lines = archive.read("variants.jsonl").decode("utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == RECORDS
+
+        from docx import Document
+
+        document = Document(io.BytesIO(archive.read("The_Achiever/The_Achiever.docx")))
+        texts = [paragraph.text for paragraph in document.paragraphs]
+        assert texts[:4] == ["The Achiever", "Content: welcome.txt", "Hello.", "Welcome."]
+
+
+def test_export_zip_with_selected_formats():
+    records = [record for number in range(50) for record in variant_records("Explorer", f"email_{number}", "Text.")]
+    with zipfile.ZipFile(build_export_zip(records, formats=[FORMAT_TXT, FORMAT_CSV], max_memory_bytes=100)) as archive:
+        assert len(archive.namelist()) == 51
+        assert not any(name.endswith((".docx", ".jsonl")) for name in archive.namelist())
+
+
+def test_export_bytes_are_accepted_by_streamlit_download_button():
+    from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+    data, _ = convert_data_to_bytes_and_infer_mime(export_zip_bytes(RECORDS), unsupported_error=TypeError())
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert "variants.jsonl" in archive.namelist()
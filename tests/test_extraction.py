@@ -0,0 +1,54 @@
+import pytest
+
+from darts_core.extraction import (
+    chunk_text, extract_darts_structured, is_generic_dart, merge_darts, normalize_dart_name, parse_darts_json,
+)
+from darts_core.pipeline import extract_all_darts
+
+DOCUMENT = "Our Darts\n\nDart: Achiever\nDriven by goals.\n\nDart: Red\nA colour.\n\nDart: Explorer\nCurious."
+
+
+def test_normalize_and_generic_names():
+    assert normalize_dart_name("2. The Achiever!") == "the achiever"
+    assert is_generic_dart("Red Team", ["Red"])
+    assert not is_generic_dart("Redwood", ["Red"])
+
+
+def test_parse_darts_json_validates_the_shape():
+    darts = parse_darts_json(
+        '{"darts": [{"name": " Achiever ", "characteristics": ["- driven"], "psychographic_drivers": "success"}]}'
+    )
+    assert darts == [("Achiever", ["driven"], ["success"])]
+    invalid = ["not json", '{"darts": {}}', '{"darts": [{"name": ""}]}', '{"darts": [{"name": "A", "characteristics": [1]}]}']
+    for bad in invalid:
+        with pytest.raises(ValueError):
+            parse_darts_json(bad)
+
+
+def test_chunks_break_on_paragraphs_and_merge_by_name():
+    chunks = chunk_text("a" * 30 + "\n\n" + "b" * 30 + "\n\n" + "c" * 30, max_tokens=20)
+    assert chunks == ["a" * 30 + "\n\n" + "b" * 30, "c" * 30]
+    merged = merge_darts([[("Achiever", ["driven"], [])], [("1. achiever", ["driven", "bold"], ["success"])]])
+    assert merged == [("Achiever", ["driven", "bold"], ["success"])]
+
+
+def test_structured_extraction_in_one_request(llm, mock_server):
+    darts = extract_darts_structured(llm, DOCUMENT, generic_darts=["Red"])
+    assert list(darts) == ["Achiever", "Explorer"]
+    assert darts["Achiever"]["Characteristics"] == "Achiever trait"
+    assert mock_server.stats["requests"] == 1
+
+
+def test_large_documents_are_extracted_in_chunks(llm, mock_server):
+    darts = extract_darts_structured(llm, DOCUMENT, generic_darts=["Red"], max_context_tokens=10)
+    assert list(darts) == ["Achiever", "Explorer"]
+    assert mock_server.stats["requests"] > 1
+
+
+def test_per_dart_extraction_reports_each_dart(llm):
+    reported = []
+    darts = extract_all_darts(
+        llm, DOCUMENT, generic_darts=["Red"], structured=False, on_result=lambda result: reported.append(result.item)
+    )
+    assert sorted(darts) == sorted(reported) == ["1. Achiever", "3. Explorer"]  # Names keep the model's numbering
+    assert darts["3. Explorer"] == {"Characteristics": "Explorer trait", "Psychographic Drivers": "Explorer driver"}
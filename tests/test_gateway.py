@@ -0,0 +1,106 @@
+import threading
+import time
+
+import openai
+import pytest
+
+from benchmarks.mock_openai import MockOpenAIServer
+from darts_core.concurrency import map_bounded
+from darts_core.gateway import FairLimiter, LLMGateway
+from darts_core.llm import LLMClient
+from darts_core.metrics import STAGE_GENERATION, MetricsRecorder
+
+MESSAGES = [{"role": "user", "content": "Write a greeting."}]
+
+
+@pytest.fixture
+def slow_server():
+    """A mock server that takes 0.3 s per request and rejects more than two at once."""
+    server = MockOpenAIServer(latency=0.3, tokens_per_second=0, completion_tokens=10, max_concurrency=2, seed=1)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def slow_gateway(server, max_concurrency):
+    return LLMGateway(
+        client=openai.OpenAI(base_url=server.url, api_key="mock", max_retries=0), max_concurrency=max_concurrency
+    )
+
+
+def test_fair_limiter_grants_slots_round_robin_between_sessions():
+    limiter = FairLimiter(1)
+    limiter.acquire("busy")
+    granted = []
+
+    def request(session, name):
+        limiter.acquire(session)
+        granted.append(name)
+        limiter.release()
+
+    threads = []
+    for session, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]:
+        threads.append(threading.Thread(target=request, args=(session, name)))
+        threads[-1].start()
+        while limiter.waiting() < len(threads):
+            time.sleep(0.001)
+    limiter.release()
+    for thread in threads:
+        thread.join(5)
+    assert granted == ["a1", "b1", "a2", "a3"]
+
+
+def test_fair_limiter_resize_grants_waiting_requests():
+    limiter = FairLimiter(1)
+    limiter.acquire(None)
+    waiter = threading.Thread(target=limiter.acquire, args=(None,))
+    waiter.start()
+    while not limiter.waiting():
+        time.sleep(0.001)
+    limiter.resize(2)
+    waiter.join(5)
+    assert not waiter.is_alive() and limiter.active == 2
+
+
+def test_identical_concurrent_requests_share_one_api_call(slow_server):
+    gateway = slow_gateway(slow_server, 4)
+    results = map_bounded(lambda _: gateway.complete("gpt-4o-mini", MESSAGES), range(4), max_workers=4)
+    assert len({result.value for result in results}) == 1
+    assert slow_server.stats["requests"] == 1
+    assert gateway.stats()["coalesced"] == 3
+
+
+def test_identical_concurrent_streams_replay_one_api_stream(slow_server):
+    gateway = slow_gateway(slow_server, 4)
+    results = map_bounded(lambda _: "".join(gateway.stream("gpt-4o-mini", MESSAGES)), range(3), max_workers=3)
+    assert len({result.value for result in results}) == 1 and results[0].value
+    assert slow_server.stats["requests"] == 1
+
+
+def test_concurrency_cap_keeps_requests_under_the_provider_limit(slow_server):
+    gateway = slow_gateway(slow_server, 2)
+    prompts = [[{"role": "user", "content": f"Prompt {number}"}] for number in range(6)]
+    results = map_bounded(lambda messages: gateway.complete("gpt-4o-mini", messages), prompts, max_workers=6)
+    assert all(result.error is None for result in results)
+    assert slow_server.stats["throttled"] == 0
+
+
+def test_closing_the_last_reader_stops_the_api_stream():
+    server = MockOpenAIServer(latency=0.0, tokens_per_second=20, completion_tokens=200, seed=1)
+    server.start()
+    try:
+        gateway = slow_gateway(server, 2)
+        llm = LLMClient(gateway, metrics=MetricsRecorder())
+        chunks = llm.stream("Write a greeting.", stage=STAGE_GENERATION)
+        next(chunks)
+        chunks.close()
+        deadline = time.monotonic() + 2  # The full stream would take 10 s
+        while gateway.stats()["active"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert gateway.stats()["active"] == 0
+        (record,) = llm.metrics.records()
+        assert record.error == "GeneratorExit()"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,40 @@
+from darts_core.graph import DependencyGraph
+
+
+def test_resolve_recomputes_only_when_inputs_change():
+    graph = DependencyGraph()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"Brand Voice": "Warm."}
+
+    graph.resolve("brand_summary", compute, inputs=("guide v1",))
+    graph.begin_run()
+    graph.resolve("brand_summary", compute, inputs=("guide v1",))
+    assert len(calls) == 1 and graph.recomputed == []
+    graph.resolve("brand_summary", compute, inputs=("guide v2",))
+    assert len(calls) == 2 and graph.recomputed == ["brand_summary"]
+
+
+def test_fingerprints_follow_upstream_values():
+    graph = DependencyGraph()
+    graph.set("brand_summary", "f1", {"Brand Voice": "Warm."})
+    variant = graph.fingerprint(inputs=("content",), deps=["brand_summary"])
+    graph.set(("variant", "Achiever", "a.txt"), variant, "Text")
+
+    graph.set("brand_summary", "f1", {"Brand Voice": "Warm."})  # Same value: dependants stay current
+    assert graph.fingerprint(inputs=("content",), deps=["brand_summary"]) == variant
+
+    graph.set("brand_summary", "f2", {"Brand Voice": "Bold."})
+    changed = graph.fingerprint(inputs=("content",), deps=["brand_summary"])
+    assert changed != variant
+    assert graph.get(("variant", "Achiever", "a.txt"), changed) is None
+    assert graph.get(("variant", "Achiever", "a.txt"), variant) == "Text"
+
+
+def test_unknown_dependencies_fingerprint_as_missing():
+    graph = DependencyGraph()
+    missing = graph.fingerprint(inputs=("x",), deps=["darts"])
+    graph.set("darts", "f", {})
+    assert graph.fingerprint(inputs=("x",), deps=["darts"]) != missing
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from darts_core.jobs import (
+    CANCELLED, DONE, JOB_EXTRACT_DARTS, QUEUED, JobQueue, register_pipeline_jobs,
+)
+from darts_core.store import ProjectStore
+
+
+def wait_for(queue, job_id, statuses=(DONE, CANCELLED), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+def test_jobs_run_by_priority_then_age(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1)
+    order = []
+    queue.register("echo", lambda payload, context: order.append(payload) or payload)
+    low = queue.submit("echo", "low")
+    high = queue.submit("echo", "high", priority=5)
+    urgent = queue.submit("echo", "urgent")
+    queue.prioritise(urgent)
+    queue.start()
+    for job_id in (low, high, urgent):
+        wait_for(queue, job_id)
+    queue.stop()
+    assert order == ["urgent", "high", "low"]
+    assert queue.get(low)["result"] == "low"
+
+
+def test_submit_dedupes_on_kind_project_and_key(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1)
+    first = queue.submit("echo", 1, project="p", key="k")
+    assert queue.submit("echo", 2, project="p", key="k") == first
+    assert queue.submit("echo", 3, project="other", key="k") != first
+    queue.cancel(first)
+    assert queue.get(first)["status"] == CANCELLED
+    assert queue.submit("echo", 4, project="p", key="k") != first
+
+
+def test_running_jobs_are_requeued_on_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path, workers=1)
+    started = threading.Event()
+    queue.register("hang", lambda payload, context: started.set() or threading.Event().wait(5))
+    job_id = queue.submit("hang", None)
+    queue.start()
+    assert started.wait(5)
+    assert JobQueue(path, workers=1).get(job_id)["status"] == QUEUED
+
+
+class SlowLLM:
+    """Stand-in LLMClient: lists 20 Darts and answers each detail request after a delay."""
+
+    def __init__(self):
+        self.detail_calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, prompt, stage=None, dart=None, **params):
+        if "List only the names" in prompt:
+            return "\n".join(f"{number}. Dart {number}" for number in range(1, 21))
+        with self.lock:
+            self.detail_calls += 1
+        time.sleep(0.2)
+        return "- Characteristics: Calm\n- Psychographic Drivers: Safety"
+
+
+def test_cancelled_extraction_stops_without_running_every_dart(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1)
+    llm = SlowLLM()
+    register_pipeline_jobs(queue, lambda payload: llm, ProjectStore(str(tmp_path / "store.sqlite3")))
+    job_id = queue.submit(JOB_EXTRACT_DARTS, {
+        "project": "p", "input_hash": "h", "text": "Darts document", "generic_darts": [], "max_workers": 2,
+        "structured": False, "context_tokens": 1000,
+    })
+    queue.start()
+    while not llm.detail_calls:
+        time.sleep(0.01)
+    began = time.monotonic()
+    queue.cancel(job_id)
+    assert wait_for(queue, job_id, timeout=2)["status"] == CANCELLED
+    assert time.monotonic() - began < 1
+    queue.stop()
+    assert llm.detail_calls < 20
@@ -0,0 +1,68 @@
+import time
+
+from darts_core.gateway import LLMGateway
+from darts_core.llm import LLMClient
+from darts_core.llm_cache import CACHE_BYPASS, CACHE_REFRESH, CompletionCache, cache_key
+from darts_core.metrics import MetricsRecorder
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def test_cache_key_covers_model_messages_and_params():
+    key = cache_key("gpt-4o-mini", MESSAGES)
+    assert key == cache_key("gpt-4o-mini", [dict(MESSAGES[0])])
+    assert key != cache_key("gpt-4o", MESSAGES)
+    assert key != cache_key("gpt-4o-mini", [{"role": "user", "content": "Hello!"}])
+    assert key != cache_key("gpt-4o-mini", MESSAGES, temperature=0)
+
+
+def test_cache_hits_misses_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = CompletionCache(path)
+    assert cache.get("key") is None
+    cache.set("key", "value", model="gpt-4o-mini")
+    assert cache.get("key") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 5}
+    assert CompletionCache(path).get("key") == "value"
+
+
+def test_cache_expires_old_entries(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"), max_age=0.05)
+    cache.set("key", "value")
+    time.sleep(0.1)
+    assert cache.get("key") is None
+
+
+def test_cache_evicts_least_recently_used_entries_over_max_bytes(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.set("old", "12345")
+    cache.set("used", "12345")
+    time.sleep(0.01)
+    cache.get("old")
+    cache.set("new", "12345")
+    assert cache.get("used") is None
+    assert cache.get("old") == "12345" and cache.get("new") == "12345"
+
+
+def make_client(mock_client, tmp_path, **options):
+    return LLMClient(
+        LLMGateway(client=mock_client), cache=CompletionCache(str(tmp_path / "cache.sqlite3")),
+        metrics=MetricsRecorder(), **options,
+    )
+
+
+def test_repeated_prompts_are_served_from_the_cache(mock_server, mock_client, tmp_path):
+    llm = make_client(mock_client, tmp_path)
+    first = llm.complete("Write a greeting.")
+    assert llm.complete("Write a greeting.") == first
+    assert "".join(llm.stream("Write a greeting.")) == first
+    assert mock_server.stats["requests"] == 1
+    (row,) = llm.metrics.summary()
+    assert (row["calls"], row["cache_hits"]) == (3, 2)
+
+
+def test_refresh_and_bypass_modes_call_the_api(mock_server, mock_client, tmp_path):
+    make_client(mock_client, tmp_path).complete("Write a greeting.")
+    make_client(mock_client, tmp_path, cache_mode=CACHE_REFRESH).complete("Write a greeting.")
+    make_client(mock_client, tmp_path, cache_mode=CACHE_BYPASS).complete("Write a greeting.")
+    assert mock_server.stats["requests"] == 3
@@ -0,0 +1,46 @@
+import re
+
+from darts_core.metrics import STAGE_GENERATION, MetricsRecorder, call_cost
+
+
+def samples(text, name):
+    """Return {labels: value} for the samples of one metric in Prometheus text."""
+    found = {}
+    for line in text.splitlines():
+        match = re.match(rf"{name}\{{(.*)\}} (\S+)$", line)
+        if match:
+            found[match.group(1)] = float(match.group(2))
+    return found
+
+
+def test_call_cost_uses_model_prices():
+    assert call_cost("gpt-4o-mini", 1_000_000, 1_000_000) == 0.75
+    assert call_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_summary_totals_and_uncached_quantiles():
+    metrics = MetricsRecorder()
+    metrics.record_call(STAGE_GENERATION, "gpt-4o-mini", 2.0, prompt_tokens=100, completion_tokens=50)
+    metrics.record_call(STAGE_GENERATION, "gpt-4o-mini", 4.0, prompt_tokens=100, completion_tokens=50)
+    metrics.record_call(STAGE_GENERATION, "gpt-4o-mini", 0.001, cached=True, prompt_tokens=100, completion_tokens=50)
+    (row,) = metrics.summary()
+    assert (row["calls"], row["cache_hits"], row["prompt_tokens"]) == (3, 1, 300)
+    assert row["cost"] == round(2 * call_cost("gpt-4o-mini", 100, 50), 6)
+    assert row["wall_p50"] == 4.0 and row["wall_p95"] == 4.0
+
+
+def test_prometheus_summary_counts_the_same_calls_as_its_quantiles():
+    metrics = MetricsRecorder()
+    for wall_time in (1.0, 2.0, 3.0):
+        metrics.record_call(STAGE_GENERATION, "gpt-4o-mini", wall_time)
+    metrics.record_call(STAGE_GENERATION, "gpt-4o-mini", 0.01, cached=True)
+    text = metrics.to_prometheus()
+
+    live = 'stage="generation",model="gpt-4o-mini",cached="false"'
+    cached = 'stage="generation",model="gpt-4o-mini",cached="true"'
+    assert samples(text, "darts_llm_wall_seconds_count") == {live: 3, cached: 1}
+    assert samples(text, "darts_llm_wall_seconds_sum") == {live: 6.0, cached: 0.01}
+    quantiles = samples(text, "darts_llm_wall_seconds")
+    assert quantiles[live + ',quantile="0.5"'] == 2.0
+    assert quantiles[cached + ',quantile="0.5"'] == 0.01
+    assert samples(text, "darts_llm_calls_total") == {'stage="generation",model="gpt-4o-mini"': 4}
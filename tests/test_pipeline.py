@@ -0,0 +1,42 @@
+from darts_core.pipeline import personalize_content, schedule_variants
+
+DARTS = {
+    "Achiever": {"Characteristics": "Driven by goals."},
+    "The Achievers": {"Characteristics": "Driven by goals."},
+    "Explorer": {"Characteristics": "Curious about new things."},
+}
+CONTENT = {"welcome.txt": "Welcome aboard.", "copy.txt": "Welcome aboard.", "offer.txt": "Half price this week."}
+BRAND = {"Brand Voice": "Warm.", "Brand Positioning": "Local.", "Unique Value Propositions": "Fast."}
+CLUSTERS = [["Achiever", "The Achievers"], ["Explorer"]]
+
+
+def test_schedule_variants_without_clusters_shares_identical_content():
+    units = schedule_variants(CONTENT, DARTS)
+    assert len(units) == 6
+    assert units[0] == ("Achiever", (("Achiever", "welcome.txt"), ("Achiever", "copy.txt")))
+
+
+def test_schedule_variants_shares_one_unit_per_cluster():
+    units = schedule_variants(CONTENT, DARTS, clusters=CLUSTERS)
+    assert [dart for dart, _ in units] == ["Achiever", "Achiever", "Explorer", "Explorer"]
+    assert units[0][1] == (
+        ("Achiever", "welcome.txt"), ("Achiever", "copy.txt"),
+        ("The Achievers", "welcome.txt"), ("The Achievers", "copy.txt"),
+    )
+    served = {target for _, targets in units for target in targets}
+    assert served == {(dart, name) for dart in DARTS for name in CONTENT}
+
+
+def test_schedule_variants_skips_completed_pairs():
+    skip = {("Achiever", "welcome.txt"), ("Achiever", "copy.txt"), ("The Achievers", "welcome.txt"),
+            ("The Achievers", "copy.txt")}
+    units = schedule_variants(CONTENT, DARTS, skip=skip, clusters=CLUSTERS)
+    assert all(target not in skip for _, targets in units for target in targets)
+    assert len(units) == 3
+
+
+def test_personalize_content_with_clusters_fills_every_pair(llm, mock_server):
+    results = personalize_content(llm, CONTENT, BRAND, DARTS, max_workers=2, clusters=CLUSTERS)
+    assert {result.item for result in results} == {(dart, name) for dart in DARTS for name in CONTENT}
+    assert all(result.error is None and result.value for result in results)
+    assert mock_server.stats["requests"] == 4
@@ -0,0 +1,66 @@
+from darts_core.documents import PAGE_BREAK
+from darts_core.preprocess import (
+    clean_document, collapse_whitespace, drop_near_duplicates, join_pages, minhash, shingles, strip_repeated_lines,
+)
+
+LEGAL = "All content copyright Acme Corporation and may not be reproduced without permission."
+
+
+def page(number, body):
+    return f"ACME Brand Guide\n{body}\nMore about section {number} here.\n{LEGAL}\nPage {number} of 6"
+
+
+PAGES = [page(number, f"Section {number} explains how the brand speaks to audience {number}.") for number in range(1, 7)]
+
+
+def test_repeated_headers_footers_and_page_numbers_are_stripped():
+    pages, removed = strip_repeated_lines(PAGES)
+    assert removed == 18
+    assert all("ACME Brand Guide" not in text and "Page" not in text and LEGAL not in text for text in pages)
+    assert "Section 3 explains" in pages[2]
+
+
+def test_body_lines_are_kept_when_only_edges_are_stripped():
+    pages, _ = strip_repeated_lines(PAGES, body_lines=False)
+    assert all(LEGAL in text and "Page" not in text for text in pages)
+
+
+def test_short_documents_are_left_alone():
+    assert strip_repeated_lines(PAGES[:2]) == (PAGES[:2], 0)
+
+
+def test_collapse_whitespace():
+    assert collapse_whitespace("  a   b \n\n\n\n c  ") == "a b\n\nc"
+
+
+def test_minhash_signatures_of_similar_paragraphs_mostly_agree():
+    first = "Our team helps you reach the goals that matter with clear steps and honest advice every day."
+    edited = first.replace("honest", "candid")
+    other = "Spring sale prices drop by half on every item in the store until the end of the month."
+    agreement = sum(a == b for a, b in zip(minhash(shingles(first)), minhash(shingles(edited))))
+    assert agreement > sum(a == b for a, b in zip(minhash(shingles(first)), minhash(shingles(other))))
+    assert shingles("Too short to dedupe.") is None
+
+
+def test_near_duplicate_paragraphs_keep_the_first():
+    paragraph = "Our team helps you reach the goals that matter with clear steps and honest advice every single day."
+    kept, removed = drop_near_duplicates([
+        paragraph, "Short heading", paragraph.replace("single ", ""), "Short heading",
+        "A completely different paragraph about prices, delivery times and the returns policy of the store.",
+    ])
+    assert removed == 1
+    assert kept[0] == paragraph and kept.count("Short heading") == 2
+
+
+def test_clean_document_reports_the_savings():
+    cleaned = clean_document(PAGE_BREAK.join(PAGES))
+    assert cleaned.repeated_lines == 18
+    assert cleaned.tokens_after < cleaned.tokens_before
+    assert "Section 6 explains" in cleaned.text
+    assert "\n\n\n" not in cleaned.text
+
+
+def test_join_pages_turns_page_breaks_into_paragraph_breaks():
+    text = join_pages(f"Hello,\nfirst page.\n{PAGE_BREAK}Second page.\n")
+    assert text == "Hello,\nfirst page.\n\nSecond page."
+    assert PAGE_BREAK not in text
@@ -0,0 +1,33 @@
+from darts_core.retrieval import SectionIndex, select_dart_context, split_sections
+
+FILLER = " ".join(["Background information about the market and its many segments."] * 20)
+DOCUMENT = "\n\n".join([
+    "Introduction", FILLER,
+    "The Achiever", "Achievers are driven by goals and visible success at work.",
+    "The Explorer", "Explorers are curious and look for new experiences.",
+    "Appendix", FILLER,
+])
+
+
+def test_paragraphs_are_tagged_with_their_heading():
+    sections = split_sections(DOCUMENT)
+    assert ("The Achiever", "Achievers are driven by goals and visible success at work.") in sections
+    assert ("The Explorer", "") in sections
+
+
+def test_search_ranks_the_matching_section_first():
+    index = SectionIndex(DOCUMENT)
+    _, best = index.search("explorer")[0]
+    assert index.sections[best][0] == "The Explorer"
+    assert index.search("nonexistentword") == []
+
+
+def test_context_stays_within_budget_and_keeps_the_dart():
+    context = select_dart_context(DOCUMENT, "2. The Achiever", token_budget=60)
+    assert "driven by goals" in context
+    assert "Background information" not in context
+    assert len(context) // 4 + 1 <= 60
+
+
+def test_small_documents_are_sent_whole():
+    assert select_dart_context(DOCUMENT, "Achiever", token_budget=100_000) == DOCUMENT
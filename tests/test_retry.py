@@ -0,0 +1,68 @@
+import email.utils
+import time
+from types import SimpleNamespace
+
+import openai
+
+from benchmarks.mock_openai import MockOpenAIServer
+from darts_core.gateway import FairLimiter, LLMGateway
+from darts_core.retry import AIMDController, RetryPolicy, is_retryable, retry_after_seconds
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_retryable_errors():
+    assert is_retryable(StatusError(429)) and is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400)) and not is_retryable(ValueError())
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(StatusError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(StatusError(429, {"retry-after": "3"})) == 3.0
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 50 < retry_after_seconds(StatusError(429, {"retry-after": later})) <= 60
+    assert retry_after_seconds(StatusError(429)) is None
+
+
+def test_retry_policy_backoff_and_attempt_limit():
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=5.0)
+    assert policy.should_retry(StatusError(429), 1) and not policy.should_retry(StatusError(429), 2)
+    assert all(0 <= policy.delay(StatusError(500), attempt) <= min(5.0, 2 ** attempt) for attempt in range(6))
+    assert 2.0 <= policy.delay(StatusError(429, {"retry-after": "2"}), 0) <= 3.0
+
+
+def test_aimd_halves_on_throttling_once_per_cooldown_and_grows_back():
+    limiter = FairLimiter(8)
+    aimd = AIMDController(limiter, cooldown=60)
+    aimd.on_throttle()
+    aimd.on_throttle()
+    assert limiter.limit == 4 and aimd.throttled == 2
+    for _ in range(5):  # About one slot per window of `limit` successes
+        aimd.on_success()
+    assert limiter.limit == 5
+    for _ in range(100):
+        aimd.on_success()
+    assert limiter.limit == 8
+
+
+def test_gateway_retries_throttled_requests():
+    server = MockOpenAIServer(latency=0.0, tokens_per_second=0, completion_tokens=5, throttle_rate=0.5,
+                              retry_after=0.01, seed=3)
+    server.start()
+    try:
+        gateway = LLMGateway(
+            client=openai.OpenAI(base_url=server.url, api_key="mock", max_retries=0),
+            retry_policy=RetryPolicy(max_attempts=20, base_delay=0.01),
+        )
+        for number in range(5):
+            assert gateway.complete("gpt-4o-mini", [{"role": "user", "content": f"Prompt {number}"}])
+        assert server.stats["throttled"] > 0
+        assert gateway.stats()["retries"] == gateway.stats()["throttled"] == server.stats["throttled"]
+    finally:
+        server.shutdown()
+        server.server_close()
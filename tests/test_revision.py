@@ -0,0 +1,79 @@
+import pytest
+
+from darts_core.revision import (
+    build_paragraph_revision_prompt, parse_revised_paragraphs, plan_revision, revise_paragraphs, target_paragraphs,
+)
+
+PARAGRAPHS = ["Dear reader,", "Our spring sale starts today.", "Prices drop by half.", "Shop now before it ends."]
+CONTENT = "\n\n".join(PARAGRAPHS)
+LONG_PARAGRAPHS = [f"{paragraph} {'More detail follows here. ' * 20}".strip() for paragraph in PARAGRAPHS]
+LONG_CONTENT = "\n\n".join(LONG_PARAGRAPHS)
+
+
+class ScriptedLLM:
+    """Stand-in LLMClient that returns canned answers and records the prompts it was sent."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    def complete(self, prompt, stage=None, dart=None, **params):
+        self.prompts.append(prompt)
+        return self.answers.pop(0)
+
+
+@pytest.mark.parametrize("instructions, expected", [
+    ("Make paragraph 2 punchier", [1]),
+    ("Rework the third paragraph", [2]),
+    ('Change "spring sale" to "summer sale"', [1]),
+    ("Make the closing line more urgent", [3]),
+    ("Use a friendlier greeting", [0]),
+    ("Make the whole thing more formal", None),
+    ("Mention free delivery", None),
+])
+def test_target_paragraphs_from_wording(instructions, expected):
+    assert target_paragraphs(PARAGRAPHS, instructions) == expected
+
+
+def test_plan_asks_the_model_only_when_wording_does_not_say():
+    llm = ScriptedLLM("3")
+    assert plan_revision(llm, LONG_CONTENT, "Mention free delivery") == (LONG_PARAGRAPHS, [2])
+    assert "[3] Prices drop by half." in llm.prompts[0]
+    assert LONG_PARAGRAPHS[2] not in llm.prompts[0]  # Only a preview is sent
+    assert plan_revision(llm, LONG_CONTENT, "Make paragraph 2 punchier") == (LONG_PARAGRAPHS, [1])
+    assert plan_revision(llm, LONG_CONTENT, "Make it more formal overall") == (LONG_PARAGRAPHS, None)
+    assert len(llm.prompts) == 1
+
+
+def test_plan_skips_the_locate_call_when_previews_are_the_whole_text():
+    llm = ScriptedLLM()
+    assert plan_revision(llm, CONTENT, "Mention free delivery") == (PARAGRAPHS, None)
+    assert llm.prompts == []
+
+
+def test_plan_revises_everything_for_short_texts_or_many_targets():
+    llm = ScriptedLLM("ALL", "1, 2, 3, 4")
+    assert plan_revision(llm, "One.\n\nTwo.", "Make paragraph 1 shorter")[1] is None
+    assert plan_revision(llm, CONTENT, "Rework paragraph 1, paragraph 2 and paragraph 3")[1] is None
+    assert plan_revision(llm, LONG_CONTENT, "Mention free delivery")[1] is None
+    assert plan_revision(llm, LONG_CONTENT, "Mention free delivery")[1] is None
+
+
+def test_plan_keeps_a_located_answer_with_many_targets():
+    llm = ScriptedLLM("1, 2, 3")
+    assert plan_revision(llm, LONG_CONTENT, "Mention free delivery")[1] == [0, 1, 2]
+
+
+def test_revise_paragraphs_splices_the_revised_paragraphs_back():
+    llm = ScriptedLLM("[4] Shop now, the sale ends Sunday!")
+    revised = revise_paragraphs(llm, PARAGRAPHS, [3], "Make the closing line more urgent")
+    assert revised == "\n\n".join(PARAGRAPHS[:3] + ["Shop now, the sale ends Sunday!"])
+    assert "[3] Prices drop by half." in llm.prompts[0]  # Neighbour as context
+    assert "Dear reader" not in llm.prompts[0]
+
+
+def test_revision_prompt_and_missing_paragraphs():
+    prompt = build_paragraph_revision_prompt(PARAGRAPHS, [0], "Friendlier")
+    assert "[1] Dear reader," in prompt and "[2] Our spring sale" in prompt
+    with pytest.raises(ValueError):
+        parse_revised_paragraphs("[1] Hi there,", [0, 3])
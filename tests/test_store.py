@@ -0,0 +1,30 @@
+from darts_core.store import BRAND_SUMMARY, DARTS, VARIANT, ProjectStore, input_hash
+
+
+def test_input_hash_is_stable_and_order_sensitive():
+    assert input_hash("a", {"x": 1, "y": 2}) == input_hash("a", {"y": 2, "x": 1})
+    assert input_hash("a", "b") != input_hash("b", "a")
+
+
+def test_artifacts_are_versioned_by_input_hash_and_persist(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    store = ProjectStore(path)
+    store.save("acme", DARTS, "v1", {"Achiever": {}}, label="darts.pdf")
+    store.save("acme", DARTS, "v2", {"Explorer": {}}, label="darts.pdf")
+    store.save("other", BRAND_SUMMARY, "v1", {"Brand Voice": "Warm."})
+
+    reopened = ProjectStore(path)
+    assert reopened.load("acme", DARTS, "v1") == {"Achiever": {}}
+    assert reopened.load("acme", VARIANT, "v1") is None
+    assert reopened.latest("acme", DARTS) == ("v2", {"Explorer": {}})
+    assert reopened.latest("acme", DARTS, label="other.pdf") is None
+    assert reopened.list_projects() == ["other", "acme"]
+
+
+def test_revision_history_per_dart_and_variant(tmp_path):
+    store = ProjectStore(str(tmp_path / "store.sqlite3"))
+    store.add_revision("acme", "Achiever", "h1", "Shorter", "Short text.")
+    store.add_revision("acme", "Achiever", "h2", "Warmer", "Warm text.")
+    store.add_revision("acme", "Explorer", "h1", "Bolder", "Bold text.")
+    assert [revision["instructions"] for revision in store.revisions("acme", "Achiever")] == ["Shorter", "Warmer"]
+    assert [revision["content"] for revision in store.revisions("acme", "Achiever", "h2")] == ["Warm text."]